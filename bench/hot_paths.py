@@ -0,0 +1,172 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+sys.path.append('../src/')
+import numpy as np
+import alphabet as alphabet_module
+from alphabet import Alphabet
+from sequence import Sequence
+from lexicon import Lexicon
+from utils import stream_corpus
+
+'''
+A script to time and memory-profile the learner's hot paths on the first N rows of each corpus, for several N,
+and write the results as JSON, so that runs on different commits can be compared.
+
+Run from the bench/ directory, e.g., python hot_paths.py --out results.json,
+and later python hot_paths.py --compare results.json to flag benchmarks that have slowed down.
+'''
+
+IPA_FILE = '../data/ipa.txt'
+CORPORA = ('../data/morpho.txt', '../data/childes.txt')
+
+def measure(setup, run, repeats):
+    '''
+    :setup: a function that returns the state for :run:, which is not measured
+    :run: the function to measure, called with the state
+
+    :return: a dict of the times (in seconds) of :repeats: calls to :run:, and the memory it allocates (in bytes) in one more call,
+        with tracemalloc on (so that tracing does not slow down the timed calls)
+    '''
+    times = list()
+    for _ in range(repeats):
+        state = setup()
+        gc.collect()
+        start = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - start)
+    state = setup()
+    gc.collect()
+    tracemalloc.start()
+    res = run(state)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del res
+    return {'seconds_min': min(times), 'seconds_median': statistics.median(times), 'repeats': repeats,
+            'peak_bytes': peak, 'retained_bytes': current}
+
+def _clear_feature_tables(disk=False):
+    '''
+    Clears the process-wide cache of parsed feature tables (see alphabet.load_feature_table), and, if :disk:, its copy on disk,
+    so that the next Alphabet parses :IPA_FILE: again
+    '''
+    alphabet_module._feature_tables.clear()
+    if disk:
+        path, _ = alphabet_module._file_key(IPA_FILE)
+        try:
+            os.remove(os.path.join(os.path.dirname(path), '__pycache__', f'{os.path.basename(path)}.pickle'))
+        except OSError:
+            pass
+
+def _ingest(rows):
+    lexicon = Lexicon(ipa_file=IPA_FILE)
+    for form, segmentation, analysis, freq in rows:
+        lexicon.add_form(form, segmentation, analysis, count=freq)
+    return lexicon
+
+def _collapse_state(lexicon):
+    morphs = list(lexicon.morphemes.values())
+    for morph in morphs:
+        morph._collapse_plan = None # collapse from scratch, not from the cached plan
+    return morphs
+
+def benchmarks(rows):
+    '''
+    :return: a dict from the name of each benchmark over :rows: to its (setup, run)
+    '''
+    lexicon = _ingest(rows)
+    alphabet = Alphabet(ipa_file=IPA_FILE, add_segs=True)
+    for form, *_ in rows:
+        alphabet.add_segments_from_str(form)
+    forms = list(lexicon.forms)
+    return {
+        'sequence_parse': (lambda: alphabet, lambda alph: [Sequence(form, alph) for form, *_ in rows]),
+        'lexicon_add_form': (lambda: rows, _ingest),
+        'collapse_into_abstract': (lambda: _collapse_state(lexicon), lambda morphs: [morph.collapse_into_abstract() for morph in morphs]),
+        'build_ur_sr': (lambda: lexicon, lambda lex: [lex.build_ur_sr(form) for form in forms]),
+        'build_train': (lambda: lexicon, lambda lex: lex.build_train()),
+    }, len(lexicon)
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(corpora, sizes, repeats):
+    results = list()
+    Alphabet.load(ipa_file=IPA_FILE, add_segs=True) # so that alphabet_load only clones
+    construct = lambda _: Alphabet(ipa_file=IPA_FILE, add_segs=True)
+    alphabet_benches = {
+        'alphabet_parse': (lambda: _clear_feature_tables(disk=True), construct), # parsing the file
+        'alphabet_init': (lambda: _clear_feature_tables(), construct), # loading the parsed table cached on disk, as in a new process
+        'alphabet_load': (lambda: None, lambda _: Alphabet.load(ipa_file=IPA_FILE, add_segs=True)), # cloning an alphabet already loaded in this process
+    }
+    for name, (setup, build) in alphabet_benches.items():
+        res = measure(setup, build, repeats)
+        results.append({'bench': name, 'corpus': None, 'rows': 0, 'forms': 0, **res})
+        print(f"{name}: {res['seconds_min'] * 1000:.2f} ms")
+
+    for corpus in corpora:
+        all_rows = list(stream_corpus(corpus))
+        done = set()
+        for size in sizes:
+            rows = all_rows[:size] if size > 0 else all_rows
+            if len(rows) in done: # the corpus is smaller than :size:
+                continue
+            done.add(len(rows))
+            benches, n_forms = benchmarks(rows)
+            for name, (setup, run) in benches.items():
+                res = measure(setup, run, repeats)
+                results.append({'bench': name, 'corpus': corpus, 'rows': len(rows), 'forms': n_forms, **res})
+                print(f"{corpus} rows={len(rows)} {name}: {res['seconds_min'] * 1000:.1f} ms, {res['peak_bytes'] / 2 ** 20:.1f} MiB peak")
+    return results
+
+def compare(results, baseline, tolerance):
+    '''
+    Prints the ratio of each benchmark's time to its time in :baseline:
+
+    :return: the list of (bench, corpus, rows) that are slower than in :baseline: by more than :tolerance: (a fraction)
+    '''
+    base = {(r['bench'], r['corpus'], r['rows']): r['seconds_min'] for r in baseline['results']}
+    slower = list()
+    for r in results:
+        key = (r['bench'], r['corpus'], r['rows'])
+        if key not in base or base[key] == 0:
+            continue
+        ratio = r['seconds_min'] / base[key]
+        print(f'{key[0]} {key[1]} rows={key[2]}: {ratio:.2f}x')
+        if ratio > 1 + tolerance:
+            slower.append(key)
+    return slower
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--corpora', nargs='+', default=list(CORPORA))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[500, 2000, 8000, 0], help='numbers of rows to read from each corpus (0 for all)')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--out', default='hot_paths.json')
+    parser.add_argument('--compare', default=None, help='a JSON file from an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='the slowdown (as a fraction) over --compare reported as a regression')
+    args = parser.parse_args()
+
+    results = run_suite(args.corpora, args.sizes, args.repeats)
+    meta = {'commit': _git_commit(), 'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+            'sizes': args.sizes, 'repeats': args.repeats}
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2)
+    print(f'wrote {len(results)} results to {args.out}')
+
+    if args.compare is not None:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            slower = compare(results, json.load(f), args.tolerance)
+        for bench, corpus, rows in slower:
+            print(f'regression: {bench} {corpus} rows={rows}')
+        sys.exit(1 if slower else 0)
@@ -0,0 +1,35 @@
+import argparse
+import gc
+import sys
+import tracemalloc
+sys.path.append('../src/')
+from lexicon import Lexicon
+
+'''
+A script to measure the memory taken up by a Lexicon ingested from a corpus,
+with forms stored as lists of Segments (default) and as arrays of segment ids (compact).
+
+Run from the bench/ directory, e.g., python memory.py ../data/morpho.txt
+'''
+
+def measure(corpus, compact):
+    gc.collect()
+    tracemalloc.start()
+    lexicon = Lexicon(ipa_file='../data/ipa.txt', compact=compact)
+    lexicon.ingest(corpus)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(lexicon), current, peak
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('corpus', nargs='?', default='../data/morpho.txt')
+    args = parser.parse_args()
+
+    results = dict()
+    for compact in (False, True):
+        n, current, peak = measure(args.corpus, compact)
+        results[compact] = current
+        print(f'compact={compact}: {n} forms, {current / 2 ** 20:.1f} MiB retained ({peak / 2 ** 20:.1f} MiB peak), {current / n:.0f} bytes/form')
+    print(f'reduction: {1 - results[True] / results[False]:.1%}')
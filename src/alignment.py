@@ -0,0 +1,166 @@
+import numpy as np
+from utils import EMPTY_STRING
+
+'''
+Edit-distance alignment of segment sequences, in O(n * m) time per pair.
+'''
+
+TIE_TOLERANCE = 1e-9 # costs within this of each other are ties
+
+class Aligner:
+    '''
+    Aligns pairs of sequences by inserting blanks (EMPTY_STRING), minimizing the total cost of
+    substitutions (0 for identical segments) and blanks (:gap_cost: each).
+
+    With an alphabet and feature_weighted=True, substituting one segment for another costs the fraction of features on which they differ,
+    so, e.g., l ~ r is cheaper than l ~ ɑ; otherwise every substitution costs 1.
+
+    Ties are broken by preferring, at each position, a blank in the first sequence, then a substitution, then a blank in the second
+    (so align_blanks, which only adds blanks to the first, places them as early as possible).
+    '''
+    def __init__(self, alphabet=None, gap_cost=1.0, feature_weighted=False):
+        '''
+        :alphabet: the Alphabet of the sequences; required for feature_weighted
+        :gap_cost: the cost of each blank
+        :feature_weighted: if True, substitution costs are weighted by feature differences (see above)
+        '''
+        if feature_weighted and alphabet is None:
+            raise ValueError('Feature-weighted substitution costs require an alphabet.')
+        self.alphabet = alphabet
+        self.gap_cost = gap_cost
+        self.feature_weighted = feature_weighted
+        self._costs = None # (# segments, segment x segment substitution costs)
+
+    def substitution_costs(self):
+        '''
+        :return: a (segments x segments) array, indexed by segment id, of the fraction of features on which each pair of segments differ
+        '''
+        n = len(self.alphabet.id_to_segment)
+        if self._costs is None or self._costs[0] != n: # the alphabet has grown
+            matrix = self.alphabet.feature_matrix
+            self._costs = (n, (matrix[:,np.newaxis,:] != matrix[np.newaxis,:,:]).mean(axis=2))
+        return self._costs[1]
+
+    def _tokens(self, s):
+        if type(s) is str:
+            return self.alphabet.tokenize(s) if self.alphabet is not None else list(s)
+        return list(s)
+
+    def _sub_costs(self, t1, t2):
+        '''
+        :return: the len(:t1:) x len(:t2:) matrix (as nested lists) of the costs of substituting each token of :t2: for each of :t1:
+        '''
+        if self.feature_weighted:
+            ipa_to_id = self.alphabet.ipa_to_id
+            ids1 = [ipa_to_id.get(f'{tok}', -1) for tok in t1]
+            ids2 = [ipa_to_id.get(f'{tok}', -1) for tok in t2]
+            if -1 not in ids1 and -1 not in ids2:
+                return self.substitution_costs()[np.ix_(ids1, ids2)].tolist()
+        t2 = [f'{tok}' for tok in t2]
+        return [[0.0 if f'{a}' == b else 1.0 for b in t2] for a in t1]
+
+    def _cost_to_go(self, sub, n, m, blanks_only):
+        '''
+        :return: F, where F[i][j] is the least cost of aligning the suffixes from i and j (inf if impossible)
+        '''
+        gap, inf = self.gap_cost, float('inf')
+        F = [[inf] * (m + 1) for _ in range(n + 1)]
+        F[n][m] = 0.0
+        for j in reversed(range(m)):
+            F[n][j] = F[n][j + 1] + gap
+        for i in reversed(range(n)):
+            if not blanks_only:
+                F[i][m] = F[i + 1][m] + gap
+            row, below, sub_row = F[i], F[i + 1], sub[i]
+            for j in reversed(range(m)):
+                row[j] = min(sub_row[j] + below[j + 1], gap + row[j + 1], inf if blanks_only else gap + below[j])
+        return F
+
+    def _moves(self, F, sub, i, j, n, m, blanks_only):
+        # the optimal moves from (i, j), in the order of preference: blank in the first, substitution, blank in the second
+        gap, best = self.gap_cost, F[i][j]
+        moves = list()
+        if j < m and abs(gap + F[i][j + 1] - best) <= TIE_TOLERANCE:
+            moves.append((i, j + 1))
+        if i < n and j < m and abs(sub[i][j] + F[i + 1][j + 1] - best) <= TIE_TOLERANCE:
+            moves.append((i + 1, j + 1))
+        if not blanks_only and i < n and abs(gap + F[i + 1][j] - best) <= TIE_TOLERANCE:
+            moves.append((i + 1, j))
+        return moves
+
+    def _align(self, s1, s2, return_ties, max_ties, blanks_only):
+        t1, t2 = self._tokens(s1), self._tokens(s2)
+        n, m = len(t1), len(t2)
+        if blanks_only and n > m:
+            raise ValueError(f'Cannot align {s1} to the shorter {s2} by only adding blanks to it.')
+        sub = self._sub_costs(t1, t2)
+        F = self._cost_to_go(sub, n, m, blanks_only)
+
+        def _output(path):
+            a1, a2 = list(), list()
+            for (i, j), (next_i, next_j) in zip(path, path[1:]):
+                a1.append(t1[i] if next_i > i else EMPTY_STRING)
+                a2.append(t2[j] if next_j > j else EMPTY_STRING)
+            if type(s1) is str and type(s2) is str:
+                return ''.join(f'{tok}' for tok in a1), ''.join(f'{tok}' for tok in a2)
+            return a1, a2
+
+        if not return_ties: # follow the preferred optimal move
+            path = [(0, 0)]
+            while path[-1] != (n, m):
+                path.append(self._moves(F, sub, *path[-1], n, m, blanks_only)[0])
+            return _output(path), F[0][0]
+
+        alignments = list()
+        stack = [[(0, 0)]]
+        while stack and (max_ties is None or len(alignments) < max_ties):
+            path = stack.pop()
+            if path[-1] == (n, m):
+                alignments.append(_output(path))
+                continue
+            # pushed in reverse, so that alignments come out in the order of preference
+            stack.extend(path + [move] for move in reversed(self._moves(F, sub, *path[-1], n, m, blanks_only)))
+        return alignments, F[0][0]
+
+    def align(self, s1, s2, return_ties=False, max_ties=None):
+        '''
+        :s1, s2: strings (tokenized with the alphabet, if there is one), or sequences of segments
+        :return_ties: if True, return all optimal alignments (at most :max_ties: of them), in the order of preference
+
+        :return: the optimal alignment (a1, a2) of :s1: and :s2:, with EMPTY_STRING at the blanks (strings if both are strings, else lists),
+            or a list of them if :return_ties:
+        '''
+        return self._align(s1, s2, return_ties, max_ties, blanks_only=False)[0]
+
+    def distance(self, s1, s2):
+        '''
+        :return: the cost of the optimal alignment of :s1: and :s2:
+        '''
+        t1, t2 = self._tokens(s1), self._tokens(s2)
+        return self._cost_to_go(self._sub_costs(t1, t2), len(t1), len(t2), False)[0][0]
+
+    def align_blanks(self, s1, s2, return_ties=False, max_ties=None):
+        '''
+        :s1, s2: as in align, with :s1: no longer than :s2:
+
+        :return: :s1: with blanks added so that it is as long as :s2:, minimizing the cost of the substitutions between them,
+            or a list of all such versions of :s1: if :return_ties:
+        '''
+        res = self._align(s1, s2, return_ties, max_ties, blanks_only=True)[0]
+        return [a1 for a1, _ in res] if return_ties else res[0]
+
+    def align_batch(self, pairs, return_ties=False, max_ties=None, blanks_only=False):
+        '''
+        :pairs: an iterable of (s1, s2), as in align
+        :blanks_only: if True, align as in align_blanks
+
+        :return: a list of the alignment of each pair, as returned by align (or align_blanks); repeated pairs are aligned once
+        '''
+        done = dict()
+        res = list()
+        for s1, s2 in pairs:
+            key = (s1, s2) if type(s1) is str and type(s2) is str else (tuple(f'{tok}' for tok in s1), tuple(f'{tok}' for tok in s2))
+            if key not in done:
+                done[key] = self.align_blanks(s1, s2, return_ties, max_ties) if blanks_only else self.align(s1, s2, return_ties, max_ties)
+            res.append(done[key])
+        return res
@@ -1,40 +1,90 @@
 import os
+import pickle
+import re
 from collections import defaultdict
 from itertools import product as catesian_product
+import numpy as np
 from segment import Segment
 from natural_class import NaturalClass
-from utils import SYLLABLE_BOUNDARY, UNKNOWN_CHAR, EMPTY_STRING
+from utils import SYLLABLE_BOUNDARY, UNKNOWN_CHAR, EMPTY_STRING, PRIMARY_STRESS, SECONDARY_STRESS, LEFT_WORD_BOUNDARY, RIGHT_WORD_BOUNDARY, NASALIZED
+
+FEAT_VAL_CODES = {'+': 1, '-': -1, '?': 0}
+FEAT_CODE_VALS = {code: val for val, code in FEAT_VAL_CODES.items()}
+
+BOUNDARIES = {LEFT_WORD_BOUNDARY, RIGHT_WORD_BOUNDARY, SYLLABLE_BOUNDARY, EMPTY_STRING}
+MODIFIERS = {PRIMARY_STRESS, SECONDARY_STRESS, NASALIZED}
+# a segment is a character followed by any number of modifiers
+TOKEN_RE = re.compile(f'[^{"".join(MODIFIERS)}][{"".join(MODIFIERS)}]*|[{"".join(MODIFIERS)}]+')
+
+FEATURE_TABLE_CACHE_VERSION = 1
+_feature_tables = dict() # (path, mtime) -> (feature_space, seg_to_feats)
+_registry = dict() # (path, mtime, add_segs, transition_tables) -> prototype Alphabet
+
+def _file_key(ipa_file):
+    path = os.path.realpath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ipa_file))
+    return path, os.stat(path).st_mtime_ns
+
+def load_feature_table(ipa_file):
+    '''
+    :ipa_file: a tab-separated feature table (e.g., ../data/ipa.txt), relative to this directory or absolute
+
+    :return: the (feature_space, seg_to_feats) parsed from :ipa_file:.
+        Parsed tables are cached in memory and in a __pycache__ directory next to the file,
+        keyed by the file's modification time, so each table is parsed at most once.
+    '''
+    key = _file_key(ipa_file)
+    if key in _feature_tables:
+        return _feature_tables[key]
+
+    path, _ = key
+    cache_file = os.path.join(os.path.dirname(path), '__pycache__', f'{os.path.basename(path)}.pickle')
+    try:
+        with open(cache_file, 'rb') as f:
+            version, cached_key, table = pickle.load(f)
+        if version == FEATURE_TABLE_CACHE_VERSION and cached_key == key:
+            _feature_tables[key] = table
+            return table
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+        pass
+
+    seg_to_feats = dict()
+    with open(path, 'r') as f:
+        for i, line in enumerate(f):
+            line = line.strip().split('\t')
+            seg, feats = line[0], line[1:]
+            if i == 0:
+                feature_space = feats + ['NULL']
+            else:
+                seg_to_feats[seg] = feats + ['-']
+    table = (feature_space, seg_to_feats)
+    _feature_tables[key] = table
+
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(cache_file, 'wb') as f:
+            pickle.dump((FEATURE_TABLE_CACHE_VERSION, key, table), f)
+    except OSError: # the cache is an optimization, so an unwritable directory is not an error
+        pass
+    return table
 
 class Alphabet:
     def __init__(self,
                  ipa_file='../data/ipa.txt',
                  segs=None,
-                 add_segs=False):
-
-        self.segments = set()
-        dir_path = os.path.dirname(os.path.realpath(__file__))
-
-        self.seg_to_feats = dict()
-        with open(f'{dir_path}/{ipa_file}', 'r') as f:
-            for i, line in enumerate(f):
-                line = line.strip().split('\t')
-                seg, feats = line[0], line[1:]
-                if i == 0:
-                    self.feature_space = feats + ['NULL']
-                else:
-                    self.seg_to_feats[seg] = feats + ['-']
-
-        self.seg_to_feats[UNKNOWN_CHAR] = ['?'] * (len(self.feature_space) - 1) + ['-']
-        self.seg_to_feats[EMPTY_STRING] = ['?'] * (len(self.feature_space) - 1) + ['+']
+                 add_segs=False,
+                 transition_tables=False):
+        '''
+        :transition_tables: if True, with_feats, without_feats, set_feats, assimilate, and dissimilate
+            are answered from memoized segment-id transition tables (see transition_table)
+        '''
 
-        self.ipa_to_segment = dict()
-        self.feats_to_segment = dict()
+        feature_space, seg_to_feats = load_feature_table(ipa_file)
+        self._init_tables(feature_space, seg_to_feats, transition_tables)
 
         if segs:
             self.add_segments(segs)
-        if add_segs:
-            segs = set(self.seg_to_feats.keys())
-            self.add_segments(segs)
+        if add_segs: # in file order, so that segment ids are the same in every process
+            self.add_segments(list(self.seg_to_feats.keys()))
 
         self.add_segment(UNKNOWN_CHAR)
         self.add_segment(EMPTY_STRING)
@@ -45,21 +95,205 @@ class Alphabet:
                                     #   '1', '2', '3', '4', '5', '6', '7', '8', '9'
                                       }.difference(self.seg_to_feats.keys()))
 
+    def _init_tables(self, feature_space, seg_to_feats, transition_tables):
+        self.segments = set()
+        self.feature_space = list(feature_space)
+        self.seg_to_feats = dict(seg_to_feats)
+
+        self.seg_to_feats[UNKNOWN_CHAR] = ['?'] * (len(self.feature_space) - 1) + ['-']
+        self.seg_to_feats[EMPTY_STRING] = ['?'] * (len(self.feature_space) - 1) + ['+']
+
+        self.ipa_to_segment = dict()
+        self.feats_to_segment = dict()
+        self.vec_to_segment = dict() # tuple(feature_vec) -> Segment
+        self.feature_index = {feat: i for i, feat in enumerate(self.feature_space)}
+
+        # dense segment x feature matrix (+ -> 1, - -> -1, ? -> 0), with rows indexed by segment id
+        self.ipa_to_id = dict()
+        self.id_to_segment = list()
+        self.ipa_to_bits = dict() # (plus, minus, unspec) bitmasks over feature columns
+        self._rows = list()
+        self._matrix = None
+
+        self.transition_tables = transition_tables
+        self._transitions = dict()
+        self._owned = True # False while the tables below are shared with a copy (see copy)
+        self._tokens = None # token (segment + modifiers) -> Segment, see tokenize
+        self._ext_bits = None # feature value -> bitset of segment ids, see feat_extension_bits
+        self._min_classes = dict() # (target bitset, universe bitset) -> minimal natural class, see minimal_natural_class
+
+    @classmethod
+    def load(cls, ipa_file='../data/ipa.txt', segs=None, add_segs=False, transition_tables=False):
+        '''
+        :return: an Alphabet, as from Alphabet(...), but cloned from a process-wide registry of alphabets
+            keyed by the resolved :ipa_file: and its modification time, so the file is only read and parsed once
+        '''
+        path, mtime = _file_key(ipa_file)
+        key = (path, mtime, add_segs, transition_tables)
+        if key not in _registry:
+            for stale in [k for k in _registry if k[0] == path and k[1] != mtime]:
+                del _registry[stale]
+            _registry[key] = cls(ipa_file=path, add_segs=add_segs, transition_tables=transition_tables)
+        alphabet = _registry[key].copy()
+        if segs:
+            alphabet.add_segments(segs)
+        return alphabet
+
+    def copy(self):
+        '''
+        :return: a copy-on-write clone of the alphabet.
+            The clone shares the alphabet's tables (and Segment objects) until either of them adds a segment.
+        '''
+        clone = object.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        clone._transitions = dict(self._transitions)
+        clone._tokens = None
+        clone._owned = self._owned = False
+        return clone
+
+    def to_table(self):
+        '''
+        :return: a dict of the feature space, the features of every segment (including learned underspecified ones),
+            the segments in id order, and the unused underspecified segment names, from which from_table rebuilds the alphabet
+        '''
+        return {'feature_space': list(self.feature_space),
+                'seg_to_feats': {seg: ''.join(feats) for seg, feats in self.seg_to_feats.items()},
+                'segments': [f'{seg}' for seg in self.id_to_segment],
+                'underspec_opts': list(self.underspec_opts)}
+
+    @classmethod
+    def from_table(cls, table, transition_tables=False):
+        '''
+        :table: a dict as returned by to_table
+
+        :return: an Alphabet with the same segments, segment ids, and underspecified segments as the one :table: came from,
+            without reading an ipa_file
+        '''
+        alphabet = object.__new__(cls)
+        alphabet._init_tables(table['feature_space'], {seg: list(feats) for seg, feats in table['seg_to_feats'].items()}, transition_tables)
+        alphabet.add_segments(table['segments'])
+        alphabet.underspec_opts = list(table['underspec_opts'])
+        return alphabet
+
+    def id_map(self, segments):
+        '''
+        :segments: a dict from the segment ids of another alphabet (e.g., of the same ipa_file, but grown differently) to (IPA, feature vector)
+
+        :return: a dict from each of those ids to the id of the same segment in this alphabet, which is added if missing.
+            Segments are matched by their IPA only if it has the same features here, as underspecified segments are named in the order they were learned.
+        '''
+        res = dict()
+        for seg_id, (ipa, feature_vec) in segments.items():
+            feature_vec = list(feature_vec)
+            if self.seg_to_feats.get(ipa) == feature_vec:
+                self.add_segment(ipa)
+            else:
+                self.add_underspec(feature_vec)
+                ipa = f'{self[feature_vec]}'
+            res[seg_id] = self.ipa_to_id[ipa]
+        return res
+
+    def _own(self):
+        # copy any tables shared with a clone before mutating them
+        if self._owned:
+            return
+        self.segments = set(self.segments)
+        self.seg_to_feats = dict(self.seg_to_feats)
+        self.ipa_to_segment = dict(self.ipa_to_segment)
+        self.feats_to_segment = dict(self.feats_to_segment)
+        self.vec_to_segment = dict(self.vec_to_segment)
+        self.ipa_to_id = dict(self.ipa_to_id)
+        self.id_to_segment = list(self.id_to_segment)
+        self.ipa_to_bits = dict(self.ipa_to_bits)
+        self._rows = list(self._rows)
+        self.underspec_opts = list(self.underspec_opts)
+        self._owned = True
+
     def add_segment(self, ipa_seg):
         if ipa_seg in self:
             return True
         if ipa_seg in {SYLLABLE_BOUNDARY}:
             return False
         feature_vec = self.seg_to_feats[ipa_seg]
+        self._own()
         seg = Segment(ipa_seg, feature_vec)
         self.segments.add(seg)
         self.feats_to_segment[seg._hashable] = seg
+        self.vec_to_segment[tuple(feature_vec)] = seg
         self.ipa_to_segment[f'{seg}'] = seg
+        self.ipa_to_id[f'{seg}'] = len(self.id_to_segment)
+        self.id_to_segment.append(seg)
+        self._rows.append([FEAT_VAL_CODES[val] for val in feature_vec])
+        self._matrix = None
+        self._transitions.clear() # existing tables do not cover the new segment
+        self._tokens = None
+        self._ext_bits = None
+        self._min_classes = dict()
+        self.ipa_to_bits[f'{seg}'] = tuple(sum(1 << i for i, val in enumerate(feature_vec) if val == v) for v in ('+', '-', '?'))
         return True
 
+    def feat_bits(self, seg):
+        '''
+        :seg: a segment (in any format supported by __getitem__)
+
+        :return: the (plus, minus, unspec) bitmasks of :seg:, where bit i is set if its value for self.feature_space[i] is +, -, or ?
+        '''
+        if type(seg) is str and seg in self.ipa_to_bits:
+            return self.ipa_to_bits[seg]
+        return self.ipa_to_bits[f'{self[seg]}']
+
+    def compile_feats(self, feats):
+        '''
+        :feats: an iterable of features marked with their values (e.g., {+cons, -ant, ?back})
+
+        :return: the (plus, minus, unspec) bitmasks required by :feats:, or None if no segment can have all of them
+        '''
+        masks = [0, 0, 0]
+        for feat in feats:
+            val, name = feat[:1], feat[1:]
+            if val not in FEAT_VAL_CODES or name not in self.feature_index:
+                return None
+            masks[('+', '-', '?').index(val)] |= 1 << self.feature_index[name]
+        if masks[0] & masks[1] or masks[0] & masks[2] or masks[1] & masks[2]:
+            return None
+        return tuple(masks)
+
+    @property
+    def feature_matrix(self):
+        '''
+        :return: an int8 matrix of shape (# segments, # features), whose row i encodes the features of self.id_to_segment[i]
+        '''
+        if self._matrix is None:
+            self._matrix = np.asarray(self._rows, dtype=np.int8).reshape(len(self._rows), len(self.feature_space))
+        return self._matrix
+
+    def seg_id(self, seg):
+        '''
+        :seg: a segment (in any format supported by __getitem__)
+
+        :return: the segment's row in self.feature_matrix
+        '''
+        return self.ipa_to_id[f'{self[seg]}']
+
+    def _feats_mask(self, feats):
+        '''
+        :feats: an iterable of features marked with their values (e.g., {+cons, -ant, ?back})
+
+        :return: a boolean mask over segment ids, True for the segments that have all of :feats:
+        '''
+        matrix = self.feature_matrix
+        mask = np.ones(matrix.shape[0], dtype=bool)
+        for feat in feats:
+            val, name = feat[:1], feat[1:]
+            if val not in FEAT_VAL_CODES or name not in self.feature_index:
+                return np.zeros(matrix.shape[0], dtype=bool)
+            mask &= matrix[:,self.feature_index[name]] == FEAT_VAL_CODES[val]
+        return mask
+
     def add_underspec(self, feature_vec):
         if feature_vec in self:
             return True
+        self._own()
         ipa_seg = self.underspec_opts.pop(0)
         self.seg_to_feats[ipa_seg] = feature_vec
         return self.add_segment(ipa_seg)  
@@ -68,6 +302,56 @@ class Alphabet:
         for ipa in segments:
             self.add_segment(ipa)
 
+    def tokenize(self, s):
+        '''
+        :s: a string of IPA segments, possibly marked with stress and nasalization (U+0303)
+
+        :return: the list of Segments in :s:, as constructed by Sequence(:s:, alphabet).
+            Each distinct token (a character plus its modifiers) is resolved once and then cached until the alphabet grows.
+        '''
+        if self._tokens is None:
+            self._tokens = {ipa: seg for ipa, seg in self.ipa_to_segment.items() if len(ipa) == 1 and ipa not in BOUNDARIES and ipa not in MODIFIERS}
+            self._tokens.update((ipa, Segment(ipa)) for ipa in BOUNDARIES)
+        tokens = self._tokens
+        try: # fast path: no modifiers
+            return [tokens[c] for c in s]
+        except KeyError:
+            pass
+        seq = list()
+        for token in TOKEN_RE.findall(s):
+            if token not in tokens:
+                tokens[token] = self._resolve_token(token)
+            seq.append(tokens[token])
+        return seq
+
+    def tokenize_batch(self, strings):
+        '''
+        :strings: an iterable of strings of IPA segments
+
+        :return: a list with the tokenization (see tokenize) of each of the :strings:; repeated strings are tokenized once
+        '''
+        done = dict()
+        res = list()
+        for s in strings:
+            if s not in done:
+                done[s] = self.tokenize(s)
+            res.append(list(done[s]))
+        return res
+
+    def _resolve_token(self, token):
+        seq = list()
+        for c in token:
+            if c not in MODIFIERS and c not in BOUNDARIES:
+                seq.append(self[c])
+            elif c in BOUNDARIES:
+                seq.append(Segment(c))
+            elif c == NASALIZED: # nasalized
+                seq[-1] = self.with_feats(seq[-1], 'nas')
+            else:
+                seq[-1] = self[f'{seq[-1]}{c}']
+                seq[-1].set_stress(c)
+        return seq[-1]
+
     def add_segments_from_str(self, s):
         for i in range(len(s)):
             seg = s[i]
@@ -85,17 +369,14 @@ class Alphabet:
         seg = self[seg]
         if type(feats) is str:
             feats = (feats,)
-        if not add and not all(seg.feature_vec[self.feature_space.index(feat)] for feat in feats):
+        if not add and not all(seg.feature_vec[self.feature_index[feat]] for feat in feats):
             return None
         new_feat_vec = list(seg.feature_vec)
         for feat in feats:
-            feat_index = self.feature_space.index(feat)
-            new_feat_vec[feat_index] = '+' if add else '-'
-        if new_feat_vec not in self:
-            return None
+            new_feat_vec[self.feature_index[feat]] = '+' if add else '-'
         if new_feat_vec == list(seg.feature_vec): # if the vector is unchanged, return None
             return None
-        return self[new_feat_vec]
+        return self.vec_to_segment.get(tuple(new_feat_vec))
 
     def without_feats(self, seg, feats):
         '''
@@ -104,6 +385,8 @@ class Alphabet:
 
         :return: the segment with the same features as :seg: but not those in :feats:, if such a segment exists 
         '''
+        if self.transition_tables:
+            return self._transition('without_feats', seg, feats=feats)
         return self._add_or_remove_feats(seg, feats, add=False)
 
     def with_feats(self, seg, feats):
@@ -113,6 +396,8 @@ class Alphabet:
 
         :return: the segment with the same features as :seg: and those in :feats:, if such a segment exists 
         '''
+        if self.transition_tables:
+            return self._transition('with_feats', seg, feats=feats)
         return self._add_or_remove_feats(seg, feats, add=True)
 
     def set_feats(self, seg, feats, vals):
@@ -125,14 +410,16 @@ class Alphabet:
         '''
         if len(feats) != len(vals):
             raise ValueError(f'Length of :feats: and :vals: must be equal, but are |feats| = {len(feats)} and |vals| = {len(vals)}')
+        if self.transition_tables:
+            return self._transition('set_feats', seg, feats=feats, vals=vals)
+        return self._set_feats(seg, feats, vals)
+
+    def _set_feats(self, seg, feats, vals):
         seg = self[seg]
         new_feat_vec = list(seg.feature_vec)
         for feat, val in zip(feats, vals):
-            feat_idx = self.feature_space.index(feat)
-            new_feat_vec[feat_idx] = val
-        if new_feat_vec not in self:
-            return None
-        return self[new_feat_vec]
+            new_feat_vec[self.feature_index[feat]] = val
+        return self.vec_to_segment.get(tuple(new_feat_vec))
 
     def permute(self, seg, feats, only_underspec=True):
         '''
@@ -145,7 +432,7 @@ class Alphabet:
 
         opts = list()
         for feat in feats:
-            val = seg.feature_vec[self.feature_space.index(feat)]
+            val = seg.feature_vec[self.feature_index[feat]]
             if val == '?' or not only_underspec:
                 opts.append(['+', '-'])
             else:
@@ -166,21 +453,24 @@ class Alphabet:
 
         :return: the :seg: with values of :feats: set to match those of :tgt:
         '''
+        if self.transition_tables:
+            return self._transition('assimilate', seg, tgt=tgt, feats=feats, only_underspec=only_underspec)
+        return self._assimilate(seg, tgt, feats, only_underspec)
+
+    def _assimilate(self, seg, tgt, feats, only_underspec):
         seg = self[seg]
         tgt = self[tgt]
         if type(feats) is str: # convert feats to tuple
             feats = (feats,)
         new_feat_vec = list(seg.feature_vec)
         for feat in feats: # iterate over feats
-            feat_idx = self.feature_space.index(feat) # get the feat's idx
+            feat_idx = self.feature_index[feat] # get the feat's idx
             if not only_underspec or new_feat_vec[feat_idx] == '?':
                 new_feat_vec[feat_idx] = tgt.feature_vec[feat_idx]
-        if new_feat_vec not in self:
-            return None
-        if f'{self[new_feat_vec]}'.isupper():
+        new_seg = self.vec_to_segment.get(tuple(new_feat_vec))
+        if new_seg is None or f'{new_seg}'.isupper():
             return None
-            print(seg, tgt, self[new_feat_vec])
-        return self[new_feat_vec]
+        return new_seg
 
     def dissimilate(self, seg, tgt, feats, only_underspec=False):
         '''
@@ -193,18 +483,65 @@ class Alphabet:
 
         :return: the :seg: with values of :feats: set to NOT match those of :tgt:
         '''
+        if self.transition_tables:
+            return self._transition('dissimilate', seg, tgt=tgt, feats=feats, only_underspec=only_underspec)
+        return self._dissimilate(seg, tgt, feats, only_underspec)
+
+    def _dissimilate(self, seg, tgt, feats, only_underspec):
         seg = self[seg]
         tgt = self[tgt]
         if type(feats) is str: # convert feats to tuple
             feats = (feats,)
         new_feat_vec = list(seg.feature_vec)
         for feat in feats: # iterate over feats
-            feat_idx = self.feature_space.index(feat) # get the feat's idx
+            feat_idx = self.feature_index[feat] # get the feat's idx
             if not only_underspec or new_feat_vec[feat_idx] == '?':
                 new_feat_vec[feat_idx] = self._negate_feat_val(tgt.feature_vec[feat_idx])
-        if new_feat_vec not in self:
-            return None
-        return self[new_feat_vec]
+        return self.vec_to_segment.get(tuple(new_feat_vec))
+
+    def transition_table(self, op, **kwargs):
+        '''
+        :op: one of with_feats, without_feats, set_feats, assimilate, or dissimilate
+        :kwargs: the arguments of :op: other than :seg: (e.g., tgt='i', feats='back', only_underspec=True for assimilate)
+
+        :return: an array mapping each segment id to the id of the segment that :op: maps it to (-1 if None).
+            Tables are memoized, and discarded whenever a segment is added to the alphabet.
+        '''
+        impls = {'with_feats': lambda seg, feats: self._add_or_remove_feats(seg, feats, add=True),
+                 'without_feats': lambda seg, feats: self._add_or_remove_feats(seg, feats, add=False),
+                 'set_feats': self._set_feats,
+                 'assimilate': self._assimilate,
+                 'dissimilate': self._dissimilate}
+        if op not in impls:
+            raise ValueError(f'{op} is not one of {", ".join(impls)}')
+        if 'feats' in kwargs:
+            kwargs['feats'] = (kwargs['feats'],) if type(kwargs['feats']) is str else tuple(kwargs['feats'])
+        if 'vals' in kwargs:
+            kwargs['vals'] = tuple(kwargs['vals'])
+        if 'tgt' in kwargs:
+            kwargs['tgt'] = self[kwargs['tgt']]
+        key = (op,) + tuple(sorted((name, self.ipa_to_id[val.ipa] if name == 'tgt' else val) for name, val in kwargs.items()))
+        if key not in self._transitions:
+            table = np.full(len(self.id_to_segment), -1, dtype=np.int32)
+            for i, seg in enumerate(self.id_to_segment):
+                new_seg = impls[op](seg, **kwargs)
+                if new_seg is not None:
+                    table[i] = self.ipa_to_id[new_seg.ipa]
+            self._transitions[key] = table
+        return self._transitions[key]
+
+    def apply_transition(self, seg_ids, op, **kwargs):
+        '''
+        :seg_ids: an array of segment ids (e.g., a whole corpus of segments)
+        :op: and :kwargs: as in transition_table
+
+        :return: the array of ids that :op: maps :seg_ids: to (-1 where it is undefined)
+        '''
+        return self.transition_table(op, **kwargs)[np.asarray(seg_ids, dtype=np.int64)]
+
+    def _transition(self, op, seg, **kwargs):
+        new_id = self.transition_table(op, **kwargs)[self.seg_id(seg)]
+        return None if new_id < 0 else self.id_to_segment[new_id]
 
     def _negate_feat_val(self, val):
         if val == '?':
@@ -220,20 +557,22 @@ class Alphabet:
         :key: Can be any of the following:
             - A hashable, which is a string of comma-separated binary features characterizing the segment
             - A string IPA representation of the segment
-            - A list of binary features characterizing the segment
+            - A list (or tuple) of binary features characterizing the segment
             - A Segment object
 
         :return: the Segment object corresponding to the :key: if present, otherwise None
         '''
         typ = type(key)
-        if typ is str and ',' not in key and key in self.ipa_to_segment:
-            return self.ipa_to_segment[key]
+        if typ is str:
+            seg = self.ipa_to_segment.get(key) if ',' not in key else self.feats_to_segment.get(key)
         elif typ is Segment:
-            return self[f'{key}']
-        elif typ is str and ',' in key and key in self.feats_to_segment:
-            return self.feats_to_segment[key]
-        elif typ is list:
-            return self[','.join(str(f) for f in key)]
+            seg = self.ipa_to_segment.get(key.ipa)
+        elif typ is list or typ is tuple:
+            seg = self.vec_to_segment.get(tuple(key))
+        else:
+            seg = None
+        if seg is not None:
+            return seg
 
         # otherwise, raise an error
         raise KeyError(f'"{key}" is not in the alphabet.')
@@ -244,7 +583,7 @@ class Alphabet:
         :item: Can be any of the following:
             - A hashable, which is a string of comma-separated binary features characterizing the segment
             - A string IPA representation of the segment
-            - A list of binary features characterizing the segment
+            - A list (or tuple) of binary features characterizing the segment
             - A Segment object
 
         :return: True if the :item: (segment) is in the alphabet, False if not
@@ -253,11 +592,11 @@ class Alphabet:
         if typ is str and ',' not in item:
             return item in self.ipa_to_segment
         elif typ is Segment:
-            return f'{item}' in self
+            return item.ipa in self.ipa_to_segment
         elif typ is str and ',' in item:
             return item in self.feats_to_segment
-        elif typ is list:
-            return ','.join(str(f) for f in item) in self
+        elif typ is list or typ is tuple:
+            return tuple(item) in self.vec_to_segment
         return False
 
     def __str__(self):
@@ -277,7 +616,9 @@ class Alphabet:
         '''
         if type(nat_class) is set:
             nat_class = NaturalClass(nat_class, self)
-        return set(filter(lambda seg: seg in nat_class, self.segments))
+        if nat_class._wildcard:
+            return set(self.segments)
+        return set(self.id_to_segment[i] for i in np.flatnonzero(self._feats_mask(nat_class.feats)))
 
     def extension_complement(self, nat_class):
         '''
@@ -287,7 +628,9 @@ class Alphabet:
         '''
         if type(nat_class) is set:
             nat_class = NaturalClass(nat_class, self)
-        return set(filter(lambda seg: seg not in nat_class, self.segments))
+        if nat_class._wildcard:
+            return set()
+        return set(self.id_to_segment[i] for i in np.flatnonzero(~self._feats_mask(nat_class.feats)))
 
     def complement(self, segs):
         '''
@@ -315,15 +658,125 @@ class Alphabet:
 
         :return: the features shared by the :segs:
         '''
-        return set.intersection(*list(self.feat_vals(seg, exclude_unspec=True) for seg in segs))
+        rows = self.feature_matrix[[self.seg_id(seg) for seg in segs]]
+        if len(rows) == 0:
+            raise ValueError('Cannot compute the shared features of an empty set of segments.')
+        shared = np.flatnonzero((rows == rows[0]).all(axis=0) & (rows[0] != 0))
+        return set(f'{FEAT_CODE_VALS[rows[0,i]]}{self.feature_space[i]}' for i in shared)
+
+    def feat_extension_bits(self):
+        '''
+        :return: a dict from each feature value (e.g., +cons) to the bitset (an int, with bit i for self.id_to_segment[i]) of the segments that have it
+        '''
+        if self._ext_bits is None:
+            matrix = self.feature_matrix
+            self._ext_bits = dict()
+            for j, feat in enumerate(self.feature_space):
+                for code, val in ((1, '+'), (-1, '-')):
+                    self._ext_bits[f'{val}{feat}'] = sum(1 << int(i) for i in np.flatnonzero(matrix[:,j] == code))
+        return self._ext_bits
+
+    def _seg_bits(self, segs):
+        bits = 0
+        for seg in segs:
+            bits |= 1 << self.ipa_to_id[f'{self[seg]}']
+        return bits
+
+    def _universe_bits(self, universe):
+        if universe is None: # all segments, except the placeholders
+            return self._seg_bits(seg for seg in self.ipa_to_id if seg not in {UNKNOWN_CHAR, EMPTY_STRING})
+        return self._seg_bits(universe)
+
+    def natural_classes(self, segs, universe=None, max_size=None):
+        '''
+        :segs: an iterable of segments
+        :universe: the segments that classes are evaluated against (by default, all but UNKNOWN_CHAR and EMPTY_STRING)
+        :max_size: if not None, the largest number of features to consider
+
+        :return: a generator of the feature sets whose extension within :universe: is exactly :segs:, smallest first,
+            where every feature is needed (i.e., excludes some segment that the others do not).
+            Sets are searched over bitset extensions, in increasing size, pruning (and memoizing) branches that cannot exclude every other segment.
+        '''
+        target = self._seg_bits(segs)
+        universe = self._universe_bits(universe)
+        if target & ~universe:
+            raise ValueError(f'{segs} are not all in the universe.')
+        others = universe & ~target
+        if others == 0:
+            yield set()
+            return
+        # each candidate feature is shared by all of :segs:, and excludes some other segments
+        feats, kills = list(), list()
+        for feat, bits in self.feat_extension_bits().items():
+            if bits & target == target and others & ~bits:
+                feats.append(feat)
+                kills.append(others & ~bits)
+        order = sorted(range(len(feats)), key=lambda i: -kills[i].bit_count())
+        feats, kills = [feats[i] for i in order], [kills[i] for i in order]
+        n = len(feats)
+        reach, most = [0] * (n + 1), [0] * (n + 1) # the union and largest size of the kills from i on
+        for i in reversed(range(n)):
+            reach[i] = reach[i + 1] | kills[i]
+            most[i] = max(most[i + 1], kills[i].bit_count())
+        if reach[0] != others: # even all shared features together do not pick out exactly :segs:
+            return
+
+        dead = set() # (start, uncovered, budget) with no completion
+        def _search(start, uncovered, budget, chosen):
+            if uncovered == 0:
+                if budget == 0:
+                    yield chosen
+                return
+            if budget == 0 or reach[start] & uncovered != uncovered or budget * most[start] < uncovered.bit_count():
+                return
+            key = (start, uncovered, budget)
+            if key in dead:
+                return
+            feasible = False
+            for i in range(start, n):
+                if reach[i] & uncovered != uncovered:
+                    break
+                if kills[i] & uncovered == 0: # the feature would be redundant
+                    continue
+                for res in _search(i + 1, uncovered & ~kills[i], budget - 1, chosen + [i]):
+                    feasible = True
+                    yield res
+            if not feasible:
+                dead.add(key)
+
+        def _irredundant(chosen):
+            for i in chosen:
+                rest = 0
+                for j in chosen:
+                    if j != i:
+                        rest |= kills[j]
+                if kills[i] & ~rest == 0:
+                    return False
+            return True
+
+        for size in range(1, n + 1 if max_size is None else min(n, max_size) + 1):
+            for chosen in _search(0, others, size, list()):
+                if _irredundant(chosen):
+                    yield set(feats[i] for i in chosen)
+
+    def minimal_natural_class(self, segs, universe=None):
+        '''
+        :segs: an iterable of segments
+        :universe: as in natural_classes
+
+        :return: a smallest set of features whose extension within :universe: is exactly :segs:, or None if there is none.
+            Results are memoized until the alphabet grows.
+        '''
+        key = (self._seg_bits(segs), self._universe_bits(universe))
+        if key not in self._min_classes:
+            self._min_classes[key] = next(self.natural_classes(segs, universe), None)
+        res = self._min_classes[key]
+        return set(res) if res is not None else None
 
     def feat_diff(self, seg1, seg2):
-        diff = set()
-        seg1, seg2 = self[seg1], self[seg2]
-        for i, feat in enumerate(self.feature_space):
-            if seg1.feature_vec[i] != seg2.feature_vec[i]:
-                diff.add(feat)
-        return diff
+        matrix = self.feature_matrix
+        diff = np.flatnonzero(matrix[self.seg_id(seg1)] != matrix[self.seg_id(seg2)])
+        return set(self.feature_space[i] for i in diff)
 
     def get_val(self, seg, feat):
         '''
@@ -333,7 +786,7 @@ class Alphabet:
         :return: the value of :feat: for :seg:
         '''
         seg = self[seg]
-        return seg.feature_vec[self.feature_space.index(feat)]
+        return seg.feature_vec[self.feature_index[feat]]
 
     def check_unique(self):
         feature_vecs = defaultdict(set)
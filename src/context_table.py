@@ -0,0 +1,118 @@
+import numpy as np
+
+'''
+Bulk extraction and counting of the context windows of every position of every form,
+as segment-id arrays rather than Sequences (cf. Sequence.windows).
+'''
+
+BOUNDARY = -1 # a word boundary ('#' in Sequence.windows)
+PAD = -2 # no segment (a window that extends past the left boundary)
+
+def _seq_ids(seq):
+    return getattr(seq, 'form', seq).ids() # Forms are windowed by their form
+
+def extract_windows(seqs, alphabet, k):
+    '''
+    :seqs: a list of Forms or Sequences of segments of :alphabet:
+    :k: the length of the windows, including the position itself
+
+    :return: a dict of arrays, with one row per window: 'seq' (index into :seqs:), 'pos', 'center' (segment id),
+        'left' (the k - 1 ids before the position, closest last) and 'right' (the k - 1 ids after it, closest first).
+        Ids are padded with PAD, and the boundaries are BOUNDARY.
+        As in Sequence.windows, each position has the windows with 0, ..., k - 1 segments to its left,
+        except those that extend past the right boundary; those that extend past the left boundary are cut off at it.
+    '''
+    w = k - 1
+    # each sequence is laid out as PAD * w, BOUNDARY, its ids, BOUNDARY, PAD * w
+    blocks, lengths = list(), list()
+    for seq in seqs:
+        ids = _seq_ids(seq)
+        lengths.append(len(ids))
+        blocks.append(np.concatenate([np.full(w, PAD), [BOUNDARY], np.asarray(ids, dtype=np.int64), [BOUNDARY], np.full(w, PAD)]))
+    lengths = np.asarray(lengths, dtype=np.int64)
+    buffer = np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.int64)
+    block_starts = np.cumsum(lengths + 2 * w + 2) - (lengths + 2 * w + 2)
+    seq_idx = np.repeat(np.arange(len(lengths)), lengths)
+    pos = np.arange(len(seq_idx)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    at = block_starts[seq_idx] + w + 1 + pos # the index of each position in buffer
+    offsets = np.arange(1, w + 1)
+    left_full = buffer[at[:,np.newaxis] - offsets[::-1]] # (positions, w)
+    right_full = buffer[at[:,np.newaxis] + offsets]
+
+    res = {name: list() for name in ('seq', 'pos', 'center', 'left', 'right')}
+    cols = np.arange(w)
+    for n_left in reversed(range(k)): # as ordered by Sequence.windows
+        n_right = w - n_left
+        valid = pos + n_right <= lengths[seq_idx]
+        left = np.where(cols >= w - n_left, left_full[valid], PAD)
+        right = np.where(cols < n_right, right_full[valid], PAD)
+        res['seq'].append(seq_idx[valid])
+        res['pos'].append(pos[valid])
+        res['center'].append(buffer[at[valid]])
+        res['left'].append(left)
+        res['right'].append(right)
+    return {name: np.concatenate(arrays) for name, arrays in res.items()}
+
+def render(ids, alphabet):
+    '''
+    :return: the string of the ids in a row of extract_windows' 'left' or 'right', as rendered in Sequence.windows
+    '''
+    return ''.join('#' if i == BOUNDARY else f'{alphabet.id_to_segment[i]}' for i in ids if i != PAD)
+
+class ContextTable:
+    '''
+    Counts of the (left, right) contexts of the positions of a lexicon's forms (each form counted once),
+    for each window length k and each class of the segment at the position.
+
+    A table is built once, from extract_windows, and then queried without re-windowing the forms.
+    '''
+    def __init__(self, lexicon, ks=(2, 3), classes=None):
+        '''
+        :ks: the window lengths
+        :classes: a dict from position class names to sets of segments or NaturalClasses; a position is counted under
+            every class that contains its segment. If None, each segment is its own class, named by its string.
+        '''
+        self.alphabet = lexicon.alphabet
+        self.ks = tuple(ks)
+        segs = self.alphabet.id_to_segment
+        if classes is None:
+            classes = {f'{seg}': {seg} for seg in segs}
+        self._members = dict() # class name -> boolean array, indexed by segment id
+        for name, members in classes.items():
+            self._members[name] = np.array([seg in members for seg in segs], dtype=bool)
+        self.counts = dict() # (class, k) -> {(left ids, right ids): count}
+        forms = list(lexicon.forms)
+        for k in self.ks:
+            windows = extract_windows(forms, self.alphabet, k)
+            rows = np.concatenate([windows['left'], windows['right']], axis=1)
+            for name, members in self._members.items():
+                class_rows = rows[members[windows['center']]]
+                if len(class_rows) == 0:
+                    continue
+                uniq, counts = np.unique(class_rows, axis=0, return_counts=True)
+                self.counts[(name, k)] = {(tuple(row[:k - 1]), tuple(row[k - 1:])): int(c) for row, c in zip(uniq.tolist(), counts.tolist())}
+
+    def _context_ids(self, context, k, left):
+        ids = [BOUNDARY if f'{seg}' == '#' else self.alphabet.ipa_to_id[f'{seg}'] for seg in context]
+        pad = [PAD] * (k - 1 - len(ids))
+        return tuple(pad + ids) if left else tuple(ids + pad)
+
+    def contexts(self, cls, k):
+        '''
+        :return: a dict from (left, right) context strings, as rendered by Sequence.windows, to their counts for class :cls: and window length :k:
+        '''
+        return {(render(left, self.alphabet), render(right, self.alphabet)): c for (left, right), c in self.counts.get((cls, k), dict()).items()}
+
+    def count(self, cls, k, left, right):
+        '''
+        :left, right: the contexts, as Sequences or lists of segments (and '#'), closest to the position last and first, respectively.
+            A window that is cut off at the left boundary (see extract_windows) has fewer than k - 1 context segments, starting with '#'.
+
+        :return: the number of positions of class :cls: with that window of length :k:
+        '''
+        n = len(left) + len(right)
+        cut_off = len(left) > 0 and f'{left[0]}' == '#'
+        if n > k - 1 or (n < k - 1 and not cut_off):
+            raise ValueError(f'A window of length {k} has {k - 1} context segments, unless it is cut off at the left boundary.')
+        key = (self._context_ids(left, k, True), self._context_ids(right, k, False))
+        return self.counts.get((cls, k), dict()).get(key, 0)
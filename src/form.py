@@ -1,21 +1,42 @@
+from array import array
+from sys import intern
 from alphabet import Alphabet
-from sequence import Sequence
+from sequence import FrozenSequence, CompactSequence
 
 class Form:
     '''
     A class representing a WordForm.
     '''
+    __slots__ = ('alphabet', 'form', 'is_stem', 'is_affix', 'segmentation', 'analysis', '_hash')
+
     def __init__(self, form, segmentation, analysis, alphabet=None):        
-        self.alphabet = alphabet if alphabet is not None else Alphabet()
+        self.alphabet = alphabet if alphabet is not None else Alphabet.load()
         self.alphabet.add_segments_from_str(form)
-        self.form = Sequence(form, alphabet=self.alphabet)
+        self.form = FrozenSequence(form, alphabet=self.alphabet)
         self.is_stem = analysis == 'Stem'
         self.is_affix = not self.is_stem
         self.segmentation, self.analysis = list(), list()
         for s, a in zip(segmentation.split('-'), analysis.split('-')):
             self.alphabet.add_segments_from_str(s) 
-            self.segmentation.append(Sequence(s, alphabet=self.alphabet))
-            self.analysis.append(a)
+            self.segmentation.append(FrozenSequence(s, alphabet=self.alphabet))
+            self.analysis.append(intern(a))
+
+    def compact(self):
+        '''
+        :return: a CompactForm with the same form and morphs, or self if they are not all made of alphabet segments
+        '''
+        parts = [self.form.compact()] + [s.compact() for s in self.segmentation]
+        if any(type(part) is not CompactSequence for part in parts):
+            return self
+        compact = object.__new__(CompactForm)
+        compact.alphabet = self.alphabet
+        compact.is_stem, compact.is_affix = self.is_stem, self.is_affix
+        compact.analysis = self.analysis
+        compact._hash = self.__hash__()
+        compact._ids = array('H', [len(parts)] + [len(part) for part in parts])
+        for part in parts:
+            compact._ids.extend(part._ids)
+        return compact
 
     def __str__(self):
         return f'{self.form}'
@@ -27,7 +48,7 @@ class Form:
         return len(self.form)
 
     def __eq__(self, other):
-        if type(other) is not Form:
+        if not isinstance(other, Form):
             return False
         return self.form == other.form and self.analysis == other.analysis
 
@@ -35,10 +56,78 @@ class Form:
         return not self.__eq__(other)
 
     def __hash__(self):
-        return hash(f'form_{self.form}_{self.analysis}')
+        if not hasattr(self, '_hash'): # computed once, as forms are not mutated
+            self._hash = hash(f'form_{self.form}_{self.analysis}')
+        return self._hash
 
     def __lt__(self, other):
         return f'{self} / {self.analysis}' < f'{other} / {self.analysis}'
 
     def parts(self):
         return list(zip(self.segmentation, self.analysis))
+
+
+class CompactForm(Form):
+    '''
+    A Form whose form and morphs are packed into a single array of segment ids:
+    [# parts, len(part) for each part, ids of each part], where the parts are the form followed by its morphs.
+    form and segmentation are materialized as CompactSequences on access.
+
+    Construct with Form.compact().
+    '''
+    __slots__ = ('_ids',)
+
+    @staticmethod
+    def from_ids(ids, analysis, alphabet):
+        '''
+        :ids: an array('H') of segment ids of :alphabet:, laid out as above
+        :analysis: the list of the analyses of the morphs
+
+        :return: the CompactForm of :ids:, without tokenizing any strings
+        '''
+        form = object.__new__(CompactForm)
+        form.alphabet = alphabet
+        form.analysis = [intern(a) for a in analysis]
+        form.is_stem = form.analysis == ['Stem']
+        form.is_affix = not form.is_stem
+        form._ids = ids
+        return form
+
+    def _part(self, i):
+        start = 1 + self._ids[0] + sum(self._ids[1:1 + i])
+        return CompactSequence(self._ids[start:start + self._ids[1 + i]], self.alphabet)
+
+    @property
+    def form(self):
+        return self._part(0)
+
+    @property
+    def segmentation(self):
+        return [self._part(i) for i in range(1, self._ids[0])]
+
+    def expand(self, cache=None):
+        '''
+        :cache: an optional dict from the bytes of a part's segment ids to its FrozenSequence, through which equal morphs of different forms are shared
+
+        :return: an ordinary Form with the same form and morphs, built from the segments without re-tokenizing them
+        '''
+        form = object.__new__(Form)
+        form.alphabet = self.alphabet
+        form.is_stem, form.is_affix = self.is_stem, self.is_affix
+        form.analysis = self.analysis
+        id_to_segment = self.alphabet.id_to_segment
+        ids = self._ids
+        parts = list()
+        start = 1 + ids[0]
+        for length in ids[1:1 + ids[0]]:
+            part = ids[start:start + length]
+            start += length
+            key = part.tobytes() if cache is not None else None
+            seq = cache.get(key) if cache is not None else None
+            if seq is None:
+                seq = FrozenSequence([id_to_segment[i] for i in part], self.alphabet)
+                if cache is not None:
+                    cache[key] = seq
+            parts.append(seq)
+        form.form, form.segmentation = parts[0], parts[1:]
+        return form
@@ -0,0 +1,76 @@
+import argparse
+from itertools import count as count_from
+from lexicon import Lexicon
+from utils import stream_corpus
+
+'''
+Tracks how the URs of affixes change as data accumulates (e.g., -pl going from /-lɑr/ to /-lAr/),
+by streaming a corpus into a Lexicon once and snapshotting its affixes at checkpoints.
+
+Run from the src/ directory, e.g., python learning_curve.py ../data/morpho.txt --every 1000
+'''
+
+TABLE_HEADER = ('Rows', 'Forms', 'Affix', 'UR', 'Concrete')
+
+def learning_curve(source, checkpoints, lexicon=None, changes_only=True, **kwargs):
+    '''
+    :source: a path to a corpus file in the format of data/morpho.txt, or an iterable of its lines
+    :checkpoints: an int (snapshot every :checkpoints: rows) or an increasing iterable of row counts
+    :lexicon: the Lexicon to ingest into; by default, a new lazy Lexicon, so that each snapshot only computes the URs of affixes that changed
+    :changes_only: if True, each snapshot only includes the affixes whose UR or concreteness changed since the previous snapshot
+    :kwargs: passed on to stream_corpus (e.g., sep, skip_header)
+
+    Ingests :source: in a single pass, yielding (rows, # forms, {affix: (UR, concrete)}) at each checkpoint and after the last row.
+    '''
+    if lexicon is None:
+        lexicon = Lexicon(ipa_file='../data/ipa.txt', lazy=True)
+    checkpoints = count_from(checkpoints, checkpoints) if type(checkpoints) is int else iter(checkpoints)
+    next_checkpoint = next(checkpoints, None)
+
+    prev = dict()
+    def _snapshot(rows):
+        snapshot = {affix.feat: (f'{affix.form}', affix.concrete) for affix in lexicon.affixes}
+        changed = {feat: state for feat, state in snapshot.items() if prev.get(feat) != state} if changes_only else snapshot
+        prev.clear()
+        prev.update(snapshot)
+        return rows, len(lexicon), changed
+
+    rows, last = 0, None
+    for form, segmentation, analysis, freq in stream_corpus(source, **kwargs):
+        try:
+            lexicon.add_form(form, segmentation, analysis, count=freq)
+        except KeyError: # segments not in the alphabet, as in Lexicon.ingest
+            pass
+        rows += 1
+        while next_checkpoint is not None and rows >= next_checkpoint:
+            if rows == next_checkpoint:
+                last = rows
+                yield _snapshot(rows)
+            next_checkpoint = next(checkpoints, None)
+    if last != rows:
+        yield _snapshot(rows)
+
+def curve_table(curve):
+    '''
+    :curve: the output of learning_curve
+
+    :return: a generator of (rows, # forms, affix, UR, concrete) rows, in the order of TABLE_HEADER
+    '''
+    for rows, n_forms, snapshot in curve:
+        for feat, (ur, concrete) in sorted(snapshot.items()):
+            yield rows, n_forms, feat, ur, concrete
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('corpus')
+    parser.add_argument('--every', type=int, default=1000, help='the number of rows between checkpoints')
+    parser.add_argument('--checkpoints', type=int, nargs='+', help='explicit row counts to checkpoint at (overrides --every)')
+    parser.add_argument('--tokens', action='store_true', help='learn from token frequencies')
+    parser.add_argument('--all', action='store_true', help='list every affix at every checkpoint, not just those that changed')
+    args = parser.parse_args()
+
+    lexicon = Lexicon(ipa_file='../data/ipa.txt', token_freq=args.tokens, lazy=True)
+    curve = learning_curve(args.corpus, args.checkpoints or args.every, lexicon=lexicon, changes_only=not args.all)
+    print('\t'.join(TABLE_HEADER))
+    for row in curve_table(curve):
+        print('\t'.join(f'{col}' for col in row))
@@ -1,15 +1,37 @@
 from form import Form
 from morpheme import Morpheme
 from alphabet import Alphabet
-from utils import EMPTY_STRING
+from utils import EMPTY_STRING, NASALIZED, SYLLABLE_BOUNDARY, stream_corpus
+import time
 
 class Lexicon:
-    def __init__(self, ipa_file, add_segs=True):
-        self.alphabet = Alphabet(ipa_file=ipa_file, add_segs=add_segs)
+    def __init__(self, ipa_file=None, add_segs=True, token_freq=False, compact=False, lazy=False, alphabet=None):
+        '''
+        :alphabet: if not None, the Alphabet to use (e.g., one restored from a snapshot) instead of loading :ipa_file:
+        :token_freq: if True, morphemes are learned from token frequencies (every occurance of a form, weighted by its count);
+            if False (default), from type frequencies (each unique form counts once)
+        :compact: if True, forms are stored as arrays of segment ids (see CompactForm), which saves memory on large corpora
+        :lazy: if True, adding forms only accumulates allomorph counts, and each morpheme's UR is computed when it is next read
+            (e.g., through __getitem__, build_ur_sr, or build_train), and only if its counts have changed
+        '''
+        if ipa_file is None and alphabet is None:
+            raise ValueError('A Lexicon needs an ipa_file (e.g., ../data/ipa.txt) or an alphabet.')
+        self.token_freq = token_freq
+        self.compact = compact
+        self.lazy = lazy
+        self.alphabet = alphabet if alphabet is not None else Alphabet.load(ipa_file=ipa_file, add_segs=add_segs)
         self.forms = dict()
         self.morphemes = dict()
         self.stems = set()
         self.affixes = set()
+        self._raw_forms = dict() # 'form\tanalysis' -> Form, to recognize repeated forms before parsing them
+        self._raw_aliases = dict() # Form -> its other keys in self._raw_forms, if it was added under a string other than its own
+        self._stem_index = dict() # stem string -> stem Morpheme
+        self._token_counts = dict() # Form -> number of occurances, if self.token_freq
+        self._train = dict() # Form -> (UR, SR) as of the last train_updates
+        self._train_versions = dict() # affix feature -> (Morpheme, version) as of the last train_updates
+        self._train_index = dict() # affix feature -> {Form: None} of the forms in self._train with that affix
+        self._affix_urs = dict() # affix feature -> (Morpheme, version, UR, concrete, {SR length: padded UR}), see build_ur_sr_batch
         
     def __len__(self):
         return len(self.forms)
@@ -21,7 +43,7 @@ class Lexicon:
         '''
         :key: a Morpheme object
         '''
-        if type(key) is Form:
+        if isinstance(key, Form):
             return key in self.forms
         if type(key) is Morpheme:
             return key in self.morphemes
@@ -31,7 +53,7 @@ class Lexicon:
 
     def __getitem__(self, key):
         try:
-            if type(key) is Form:
+            if isinstance(key, Form):
                 return self.forms[key]
             if type(key) is Morpheme:
                 return self.morphemes[key]
@@ -41,39 +63,249 @@ class Lexicon:
         except KeyError as e:
             raise KeyError(f'KeyError: {key} not in the Lexicon.')
 
-    def add_form(self, form, segmentation, analysis):
+    def add_form(self, form, segmentation, analysis, count=1):
+        '''
+        :count: the number of occurances of the form (e.g., its corpus frequency); only used if self.token_freq is True
+        '''
+        raw = f'{form}\t{analysis}'
+        if raw in self._raw_forms: # a repeated form, which is neither parsed nor allocated again
+            form = self._raw_forms[raw]
+            if self.token_freq:
+                self._token_counts[form] += count
+                self._add_morphemes(form, count)
+            return form
+
         form = Form(form=form, 
                     segmentation=segmentation, 
                     analysis=analysis, 
                     alphabet=self.alphabet)
+        alias = raw != f'{form.form}\t{"-".join(form.analysis)}'
+        if self.compact:
+            form = form.compact()
                     
-        if form not in self.forms:
+        new = form not in self.forms
+        if new:
             self.forms[form] = form
-            # add morphemes
-            if form.is_stem:
-                self.add_morpheme(Morpheme(form.form))
-            else:
-                for s, a in form.parts():
-                    self.add_morpheme(Morpheme(form=s, feat=a))
+        form = self.forms[form] # a form already in the lexicon is counted with its own segmentation
+        self._raw_forms[raw] = form
+        if alias:
+            self._raw_aliases.setdefault(form, list()).append(raw)
+        if self.token_freq:
+            self._token_counts[form] = self._token_counts.get(form, 0) + count
+        if new or self.token_freq:
+            self._add_morphemes(form, count if self.token_freq else 1)
 
         return form
+
+    def _add_morphemes(self, form, count):
+        parts = [(form.form, 'Stem')] if form.is_stem else form.parts()
+        for s, a in parts:
+            # probe by stem string or affix feature, only constructing a Morpheme for new ones
+            morph = self._stem_index.get(f'{s}') if a == 'Stem' else self.morphemes.get(a)
+            if morph is None:
+                self.add_morpheme(Morpheme(form=s, feat=a, count=count, lazy=self.lazy), count=count)
+            else:
+                morph.add_form(s, count=count)
     
-    def add_morpheme(self, morph):
+    def remove_form(self, form, analysis=None, count=1):
+        '''
+        :form: a Form in the lexicon, or the string of one (in which case :analysis: must be given)
+        :count: the number of occurances to remove; only used if self.token_freq is True
+
+        Undoes add_form: decrements the counts of the form's morphemes, restoring their URs for the remaining counts,
+        and drops morphemes whose counts reach zero. The form itself is removed once none of its occurances remain.
+        This makes leave-one-out analyses cheap: remove_form, inspect, then add_form to restore.
+        '''
+        key = form if isinstance(form, Form) else f'{form}\t{analysis}'
+        stored = self.forms.get(key) if isinstance(form, Form) else self._raw_forms.get(key)
+        if stored is None:
+            raise KeyError(f'KeyError: {key} not in the Lexicon.')
+        if self.token_freq:
+            if count > self._token_counts[stored]:
+                raise ValueError(f'Cannot remove {count} occurance(s) of {stored}, which occurs {self._token_counts[stored]} time(s)')
+            self._token_counts[stored] -= count
+        else:
+            count = 1
+
+        parts = [(stored.form, 'Stem')] if stored.is_stem else stored.parts()
+        for s, a in parts:
+            morph = self._stem_index.get(f'{s}') if a == 'Stem' else self.morphemes.get(a)
+            morph.remove_form(s, count=count)
+            if morph._n == 0:
+                del self.morphemes[morph]
+                if morph.is_stem:
+                    self.stems.discard(morph)
+                    del self._stem_index[f'{s}']
+                else:
+                    self.affixes.discard(morph)
+
+        if not self.token_freq or self._token_counts[stored] == 0:
+            del self.forms[stored]
+            self._token_counts.pop(stored, None)
+            for raw in [f'{stored.form}\t{"-".join(stored.analysis)}'] + self._raw_aliases.pop(stored, list()):
+                if self._raw_forms.get(raw) is stored:
+                    del self._raw_forms[raw]
+
+    def merge(self, other):
+        '''
+        :other: a Lexicon of the same ipa_file and token_freq, e.g., built from another part of the corpus
+
+        Adds :other:'s forms and morpheme counts to this lexicon, with the same result as adding its forms after this lexicon's.
+        With type frequencies, forms in both lexicons are only counted once. Each changed morpheme's UR is recomputed once
+        (or, if self.lazy, when it is next read). If the lexicons share an alphabet, :other:'s forms are shared rather than copied,
+        so it should not be changed afterwards; otherwise, they are rebuilt on this lexicon's alphabet.
+
+        :return: self
+        '''
+        if other.token_freq != self.token_freq:
+            raise ValueError('Cannot merge lexicons of type and token frequencies')
+        if other.alphabet is not self.alphabet: # rebuild :other:'s forms and allomorphs on this lexicon's alphabet
+            from packing import pack, unpack
+            other = unpack(pack(other), self)
+        overlap = dict() # other's morpheme -> allomorph -> occurances already counted by self
+        for form in other.forms:
+            if form in self.forms:
+                if not self.token_freq: # a type already counted
+                    parts = [(form.form, 'Stem')] if form.is_stem else form.parts()
+                    for s, a in parts:
+                        morph = other._stem_index[f'{s}'] if a == 'Stem' else other.morphemes[a]
+                        counts = overlap.setdefault(morph, dict())
+                        counts[s] = counts.get(s, 0) + 1
+            else:
+                self.forms[form] = form
+            if self.token_freq:
+                stored = self.forms[form]
+                self._token_counts[stored] = self._token_counts.get(stored, 0) + other._token_counts[form]
+        aliases = {raw for keys in other._raw_aliases.values() for raw in keys}
+        for raw, form in other._raw_forms.items():
+            if raw not in self._raw_forms:
+                self._raw_forms[raw] = self.forms[form]
+                if raw in aliases:
+                    self._raw_aliases.setdefault(self.forms[form], list()).append(raw)
+
+        for morph in other.morphemes:
+            mine = self._stem_index.get(f'{morph.form}') if morph.is_stem else self.morphemes.get(morph.feat)
+            if mine is None: # a copy of other's morpheme, so that the lexicons do not share counts
+                allomorphs = iter(morph._forms.items())
+                form, count = next(allomorphs)
+                mine = Morpheme(form=form, feat=morph.feat, count=count, lazy=True)
+                for form, count in allomorphs:
+                    mine.add_form(form, count=count)
+                mine.lazy = self.lazy
+                if not self.lazy:
+                    mine.update_ur()
+                self.add_morpheme(mine)
+            else:
+                mine.merge(morph, overlap=overlap.get(morph))
+        return self
+
+    def ingest(self, source, sep='\t', skip_header=True, buffer_size=1 << 20, report_every=None):
+        '''
+        :source: a path to a corpus file in the format of data/morpho.txt, or an iterable of its lines
+        :report_every: if not None, print progress (rows/sec) every :report_every: rows
+
+        Streams the corpus through add_form one row at a time, without holding it in memory.
+        Each row's Freq is passed as its count, so it is only used if self.token_freq is True.
+        Malformed rows, and rows containing segments not in the alphabet, are skipped and counted.
+
+        :return: a dict of counts (rows, added, skipped_*) along with the elapsed seconds and rows/sec
+        '''
+        stats = {'added': 0, 'skipped_unknown': 0}
+        start = time.perf_counter()
+        for form, segmentation, analysis, freq in stream_corpus(source, sep=sep, skip_header=skip_header, buffer_size=buffer_size, stats=stats):
+            n = len(self.forms)
+            try:
+                self.add_form(form, segmentation, analysis, count=freq)
+            except KeyError:
+                stats['skipped_unknown'] += 1
+                continue
+            stats['added'] += len(self.forms) - n
+            if report_every and stats['rows'] % report_every == 0:
+                elapsed = time.perf_counter() - start
+                print(f'{stats["rows"]} rows ({stats["rows"] / elapsed:.0f} rows/sec)')
+        stats['seconds'] = time.perf_counter() - start
+        stats['rows_per_sec'] = stats['rows'] / stats['seconds'] if stats['seconds'] > 0 else 0.0
+        return stats
+
+    def save(self, path):
+        '''
+        Writes a binary snapshot of the lexicon to :path: (see snapshot.py), which Lexicon.load reads back.
+        '''
+        from snapshot import save_lexicon
+        save_lexicon(self, path)
+
+    @staticmethod
+    def load(path):
+        '''
+        :return: the Lexicon saved to :path: by Lexicon.save. To open a large snapshot without materializing it, use snapshot.LexiconSnapshot.
+        '''
+        from snapshot import load_lexicon
+        return load_lexicon(path)
+
+    def add_morpheme(self, morph, count=1):
+        '''
+        :morph: a Morpheme object, which is added to the lexicon if it is new
+        :count: the number of occurances to add to the existing morpheme otherwise
+        '''
         if morph not in self.morphemes:
             self.morphemes[morph] = morph
             if morph.is_stem:
                 self.stems.add(morph)
+                self._stem_index[f'{morph.form}'] = morph
             else:
                 self.affixes.add(morph)
         else:
-            self.morphemes[morph].add_form(morph.form)
+            self.morphemes[morph].add_form(morph.form, count=count)
 
     def build_train(self):
-        train = set()
+        return sorted(set(self.iter_train()))
+
+    def iter_train(self, unique=False):
+        '''
+        :unique: if True, skip pairs that were already yielded (which holds the pairs seen so far in memory)
+
+        :return: a generator of the (UR, SR) pair of each form, in the order the forms were added.
+            The forms are those in the lexicon when iteration starts, so forms can be added while the pairs are consumed.
+        '''
+        seen = set()
+        for form in list(self.forms):
+            pair = self.build_ur_sr(form)
+            if unique:
+                if pair in seen:
+                    continue
+                seen.add(pair)
+            yield pair
+
+    def train_updates(self):
+        '''
+        Maintains the (UR, SR) pair of each form across calls: the first call derives every pair, and later calls only re-derive
+        the pairs of forms added since the previous call and of forms with an affix whose UR has changed (see Morpheme.version).
+
+        :return: (updated, removed), where updated lists (form, (UR, SR)) for each form whose pair is new or has changed,
+            in the order the forms were added, and removed lists (form, (UR, SR)) with the last pair of each form removed since the previous call
+        '''
+        removed = [(form, pair) for form, pair in self._train.items() if form not in self.forms]
+        for form, _ in removed:
+            del self._train[form]
+
+        stale = set()
+        for affix in self.affixes:
+            if self._train_versions.get(affix.feat) != (affix, affix.version):
+                self._train_versions[affix.feat] = (affix, affix.version)
+                stale.update(self._train_index.pop(affix.feat, dict()))
+
+        updated = list()
         for form in self.forms:
-            ur, sr = self.build_ur_sr(form)
-            train.add((ur, sr))
-        return sorted(train)
+            if form in self._train and form not in stale:
+                continue
+            pair = self.build_ur_sr(form)
+            if self._train.get(form) != pair:
+                updated.append((form, pair))
+                self._train[form] = pair
+            for _, a in form.parts():
+                if a != 'Stem':
+                    self._train_index.setdefault(a, dict())[form] = None
+        return updated, removed
 
     def build_ur_sr(self, form, segmentation=None, analysis=None, unknown=False, del_as_char=True, segmented=False):
         '''
@@ -81,7 +313,7 @@ class Lexicon:
         '''
         if not unknown and form not in self:
             raise ValueError(':form: parameter must be in Lexicon')
-        if not unknown and type(form) is not Form:
+        if not unknown and not isinstance(form, Form):
             raise ValueError(':form: parameter must be of type Form')
         form = self[form] if not unknown else Form(form=form, segmentation=segmentation, analysis=analysis, alphabet=self.alphabet)
         ur = '' if not segmented else list()
@@ -108,4 +340,50 @@ class Lexicon:
                     affix_ur = '?' * len(s)
                 sr += affix_sr if not segmented else [affix_sr]
                 ur += affix_ur if not segmented else [affix_ur]
-        return (ur, sr) if not segmented else ('-'.join(ur), '-'.join(sr))
\ No newline at end of file
+        return (ur, sr) if not segmented else ('-'.join(ur), '-'.join(sr))
+
+    def build_ur_sr_batch(self, forms, del_as_char=True, segmented=False):
+        '''
+        :forms: an iterable of (form, segmentation, analysis) strings, which need not be in the lexicon
+
+        :return: a list with the (UR, SR) of each of the :forms:, as from build_ur_sr(form, segmentation, analysis, unknown=True, ...),
+            but without constructing Forms or adding their segments to the alphabet. Each affix's UR, and its padding with EMPTY_STRING
+            to each SR length, is computed once and cached until the affix's UR changes (see Morpheme.version).
+        '''
+        valid = self.alphabet.seg_to_feats.keys() | self.alphabet.ipa_to_segment.keys() | {NASALIZED, SYLLABLE_BOUNDARY}
+        res = list()
+        for form, segmentation, analysis in forms:
+            for s in (form, segmentation.replace('-', '')):
+                unknown = set(s).difference(valid)
+                if unknown: # as Form would
+                    raise KeyError(f'{unknown.pop()} not in the alphabet')
+            known = f'{form}\t{analysis}' in self._raw_forms
+            ur, sr = list(), list()
+            for s, a in zip(segmentation.split('-'), analysis.split('-')):
+                if a == 'Stem':
+                    ur.append(s)
+                    sr.append(s)
+                    continue
+                affix = self.morphemes.get(a)
+                if affix is None: # morpheme not in the lexicon
+                    ur.append('?' * len(s))
+                    sr.append(s)
+                    continue
+                cached = self._affix_urs.get(a)
+                if cached is None or cached[0] is not affix or cached[1] != affix.version:
+                    cached = (affix, affix.version, f'{affix.form}', affix.concrete, dict())
+                    self._affix_urs[a] = cached
+                _, _, affix_ur, concrete, padded = cached
+                if concrete:
+                    ur.append(s if known else affix_ur)
+                    sr.append(s)
+                elif not del_as_char:
+                    ur.append(affix_ur)
+                    sr.append(s)
+                else: # pad the shorter of the UR and SR on the left (DELETION / EPENTHESIS)
+                    if len(s) not in padded:
+                        padded[len(s)] = EMPTY_STRING * (len(s) - len(affix_ur)) + affix_ur
+                    ur.append(padded[len(s)])
+                    sr.append(EMPTY_STRING * (len(affix_ur) - len(s)) + s)
+            res.append(('-'.join(ur), '-'.join(sr)) if segmented else (''.join(ur), ''.join(sr)))
+        return res
@@ -1,12 +1,16 @@
 from collections import defaultdict
 from utils import EMPTY_STRING
+from alphabet import FEAT_CODE_VALS
 import numpy as np
 
 class Morpheme:
     '''
     A class representing a morpheme.
     '''
-    def __init__(self, form, feat=None, concrete=True):
+    def __init__(self, form, feat=None, concrete=True, count=1, lazy=False):
+        '''
+        :lazy: if True, add_form only accumulates counts, and the UR (form, concrete, null) is computed when it is next read
+        '''
         self.alphabet = form.alphabet
         self.null = False # track whether morpheme has a null (emtpy) form
         if form == '':
@@ -16,8 +20,58 @@ class Morpheme:
         self.is_stem = self.feat == 'Stem'
         self.is_affix = not self.is_stem
         self._forms = defaultdict(int)
-        self.add_form(form)
+        self._n = 0 # running total of forms added
+        self._argmax = None # the most frequent form, ties broken by the (reverse) string order
+        self._argmax_str = ''
+        self._dirty = False # True if the counts have changed since the UR was computed
+        self._collapse_plan = None # (key, plan), see collapse_into_abstract
+        self._version = 0 # incremented whenever the UR changes, see version
+        self.lazy = False # the UR of a single form is trivially that form
+        self.add_form(form, count=count)
+        self.lazy = lazy
         self.concrete = concrete
+        # stems are identified by their (only) form and affixes by their feature, neither of which changes
+        self._hash = hash(f'stem_morpheme_{self.form}') if self.is_stem else hash(f'{self.feat}')
+
+    @property
+    def form(self):
+        if self._dirty:
+            self.update_ur()
+        return self._form
+
+    @form.setter
+    def form(self, form):
+        self._form = form
+
+    @property
+    def concrete(self):
+        if self._dirty:
+            self.update_ur()
+        return self._concrete
+
+    @concrete.setter
+    def concrete(self, concrete):
+        self._concrete = concrete
+
+    @property
+    def version(self):
+        '''
+        A counter that is incremented whenever the UR (form, concrete, null) changes,
+        so that values derived from the UR can be cached until it does.
+        '''
+        if self._dirty:
+            self.update_ur()
+        return self._version
+
+    @property
+    def null(self):
+        if self._dirty:
+            self.update_ur()
+        return self._null
+
+    @null.setter
+    def null(self, null):
+        self._null = null
 
     def __str__(self):
         return f'{self.form}' if self.is_stem else f'-{self.form}'
@@ -41,76 +95,174 @@ class Morpheme:
         return not self.__eq__(other)
 
     def __hash__(self):
-        if self.is_stem:
-            return hash(f'stem_morpheme_{self.form}')
-        return hash(f'{self.feat}')
+        return self._hash
 
     def __lt__(self, other):
         return f'{self}' < f'{other}'
 
     def collapse_into_abstract(self):
-        def _abstractify(_segs, _seg_freqs):
-            vec = ['?'] * len(self.alphabet.feature_space)
-            feat_diff = set()
-            for idx, feat in enumerate(self.alphabet.feature_space):
-                vals = list(set(self.alphabet.get_val(seg, feat) for seg in _segs))
-                val = vals[0] if len(vals) == 1 else '?'
-                if len(vals) > 1:
-                    feat_diff.add(feat)
-                vec[idx] = val
-            _argmax, _max = sorted(_seg_freqs.items(), reverse=True, key=lambda it: (it[-1], it[0]))[0]
-            if len(feat_diff) > 3:
-                return _argmax
+        '''
+        Aligns the forms to the most frequent length (padding on the left with EMPTY_STRING) and collapses each position
+        into the segment with the features shared by the segments there, or into the most frequent of them if they differ in more than 3 features.
 
-            if vec in self.alphabet:
-                return f'{self.alphabet[vec]}'
-            else:
-                if self.alphabet.add_underspec(vec):
-                    return f'{self.alphabet[vec]}'
-                else:
-                    raise ValueError(f'Unable to form abstract UR for {self.feat} with forms {self._forms}')
+        The per-position work depends only on the forms (not their counts), so it is computed as a plan over a matrix of segment ids,
+        which is reused until the set of forms or the alignment length changes (segments are only ever added to the alphabet,
+        so its ids, and the underspecified segments the plan adds, stay valid).
 
-        ur = ''
+        :return: the abstract UR
+        '''
         len_freq = defaultdict(int)
         for form, freq in self._forms.items():
             len_freq[len(form)] += freq
         l = sorted(len_freq.items(), reverse=True, key=lambda it: it[-1])[0][0]
-        aligned_forms = list()
-        for form in self._forms.keys():
-            aligned_form = f'{form}'
-            while len(aligned_form) < l:
-                aligned_form = f'{EMPTY_STRING}{aligned_form}'
-            while len(aligned_form) > l:
-                aligned_form = aligned_form[1:]
-            aligned_forms.append(list(aligned_form))
-        aligned_forms = np.asarray(aligned_forms)
-                    
-        for idx in range(l):
-            _segs = set()
-            _seg_freqs = defaultdict(int)
-            for form_idx, form in enumerate(self._forms.keys()):
-                seg = str(aligned_forms[form_idx,idx])
-                if seg != EMPTY_STRING:
-                    _segs.add(seg)
-                    _seg_freqs[seg] += self._forms[form]
-            ur += _abstractify(_segs, _seg_freqs)
+
+        forms = [f'{form}' for form in self._forms.keys()]
+        key = (tuple(forms), l)
+        if self._collapse_plan is None or self._collapse_plan[0] != key:
+            plan = self._collapse_plan_for(forms, l)
+            self._collapse_plan = (key, plan)
+        plan = self._collapse_plan[1]
+
+        ur = ''
+        counts = list(self._forms.values())
+        id_to_segment = self.alphabet.id_to_segment
+        for seg, column in plan:
+            if seg is None: # the segments differ too much, so take the most frequent
+                seg_freqs = defaultdict(int)
+                for seg_id, freq in zip(column, counts):
+                    if seg_id >= 0:
+                        seg_freqs[f'{id_to_segment[seg_id]}'] += freq
+                seg = max(seg_freqs.items(), key=lambda it: (it[-1], it[0]))[0]
+            ur += seg
         return ur
 
-    def add_form(self, form):
+    def _collapse_plan_for(self, forms, l):
+        '''
+        :return: a list with, for each of the :l: aligned positions of :forms:, either (the abstract segment, None),
+            or (None, the column of segment ids) if the position should be filled by its most frequent segment
+        '''
+        ids = np.full((len(forms), l), -1, dtype=np.int64)
+        for i, form in enumerate(forms):
+            aligned_form = form[-l:] if l > 0 else ''
+            for j, seg in enumerate(aligned_form, start=l - len(aligned_form)):
+                if seg != EMPTY_STRING:
+                    ids[i,j] = self.alphabet.ipa_to_id[f'{self.alphabet[seg]}']
+
+        valid = (ids >= 0)[:,:,np.newaxis]
+        vals = self.alphabet.feature_matrix[ids].astype(np.int8) # (forms, positions, features); rows of -1 are masked
+        lo = np.where(valid, vals, 2).min(axis=0)
+        hi = np.where(valid, vals, -2).max(axis=0)
+        agree = lo == hi
+        vecs = np.where(agree, lo, 0)
+        n_diff = (~agree).sum(axis=1)
+
+        plan = list()
+        for idx in range(l):
+            if not valid[:,idx].any():
+                raise ValueError(f'Unable to form abstract UR for {self.feat} with forms {self._forms}')
+            if n_diff[idx] > 3:
+                plan.append((None, ids[:,idx].tolist()))
+                continue
+            vec = [FEAT_CODE_VALS[val] for val in vecs[idx].tolist()]
+            if vec in self.alphabet:
+                plan.append((f'{self.alphabet[vec]}', None))
+            elif self.alphabet.add_underspec(vec):
+                plan.append((f'{self.alphabet[vec]}', None))
+            else:
+                raise ValueError(f'Unable to form abstract UR for {self.feat} with forms {self._forms}')
+        return plan
+
+    def add_form(self, form, count=1):
+        '''
+        :form: an allomorph of the morpheme
+        :count: the number of occurances of :form: to add (e.g., its token frequency)
+        '''
+        if count < 1:
+            raise ValueError(f':count: must be positive, but is {count}')
+        self._forms[form] += count
+        self._n += count
+        # update the most frequent form; only :form:'s count grew, so only it can overtake the current argmax
+        count = self._forms[form]
+        if self._argmax is None or count > self._forms[self._argmax] or (count == self._forms[self._argmax] and f'{form}' > self._argmax_str):
+            self._argmax = form
+            self._argmax_str = f'{form}'
+
+        if self.lazy:
+            self._dirty = True
+        else:
+            self.update_ur()
+
+    def remove_form(self, form, count=1):
+        '''
+        :form: an allomorph of the morpheme
+        :count: the number of occurances of :form: to remove
+
+        Undoes add_form(:form:, :count:), dropping :form: once its count reaches zero and restoring the UR for the remaining counts.
+        If no occurances remain (len(self) is then meaningless), the caller should discard the morpheme.
+        '''
+        if count < 1:
+            raise ValueError(f':count: must be positive, but is {count}')
+        if self._forms.get(form, 0) < count:
+            raise ValueError(f'Cannot remove {count} occurance(s) of {form} from {self.feat} with forms {dict(self._forms)}')
+        self._forms[form] -= count
+        self._n -= count
+        if self._forms[form] == 0:
+            del self._forms[form]
+        if self._n == 0:
+            self._argmax, self._argmax_str = None, ''
+            self._dirty = False
+            return
+        # only :form:'s count shrank, so the argmax only changes if it was :form:
+        if form == self._argmax:
+            self._argmax, _ = max(self._forms.items(), key=lambda it: (it[-1], f'{it[0]}'))
+            self._argmax_str = f'{self._argmax}'
+
+        if self.lazy:
+            self._dirty = True
+        else:
+            self.update_ur()
+
+    def merge(self, other, overlap=None):
+        '''
+        :other: the same morpheme (stem or affix), e.g., from another Lexicon
+        :overlap: a dict of allomorph -> number of occurances counted by both this morpheme and :other:
+            (e.g., from forms in both lexicons), which are only counted once
+
+        Adds the counts of :other:'s forms to this morpheme's, as if they were added after this morpheme's own forms.
+        '''
+        changed = False
+        for form, count in other._forms.items():
+            if overlap:
+                count -= overlap.get(form, 0)
+            if count < 0:
+                raise ValueError(f'Cannot overlap more occurances of {form} than {other.feat} has: {dict(other._forms)}')
+            if count > 0:
+                self._forms[form] += count
+                self._n += count
+                changed = True
+        if not changed:
+            return
+        self._argmax, _ = max(self._forms.items(), key=lambda it: (it[-1], f'{it[0]}'))
+        self._argmax_str = f'{self._argmax}'
+
+        if self.lazy:
+            self._dirty = True
+        else:
+            self.update_ur()
+
+    def update_ur(self):
+        '''
+        Sets the UR (form, concrete, null) from the current counts: the most frequent form,
+        unless its exceptions exceed the tolerance threshold, in which case the forms are collapsed into an abstract UR.
+        '''
+        old = (f'{self._form}', self._concrete, self._null) if self._version else None
+        self._dirty = False
         self.concrete = True
-        if form not in self._forms:
-            self.form = form
-        self._forms[form] += 1
-        # set form to most frequent form
-        try:
-            self.form = sorted(self._forms.items(), reverse=True, key=lambda it: (it[-1], f'{it[0]}'))[0][0]
-        except TypeError as e:
-            print(e)
-            print(f'***** {self._forms} *****')
-
-        n = sum(self._forms.values())
+        self.form = self._argmax
+
+        n = self._n
         assert(n >= 1)
-        e = n - self._forms[self.form] # count occurances in form other than most frequent
+        e = self.exceptions() # count occurances in form other than most frequent
         theta_n = np.log(n)
         if e > n / theta_n if theta_n > 0 else False: # keep concrete form and lexicalize exceptions                        
             abstract_form = self.collapse_into_abstract()
@@ -122,3 +274,11 @@ class Morpheme:
 
         if self.form == '':
             self.null = True
+        if (f'{self._form}', self._concrete, self._null) != old:
+            self._version += 1
+
+    def exceptions(self):
+        '''
+        :return: the number of occurances in forms other than the most frequent
+        '''
+        return self._n - self._forms[self._argmax]
@@ -19,7 +19,17 @@ class NaturalClass:
 
     def _update(self):
         self.name = '{' + ','.join(sorted(self.feats)) + '}'
-        self.extension_str = '{' + ','.join(sorted(f'{seg}' for seg in self.alphabet.extension(self))) + '}'
+        self._masks = None if self._wildcard else self.alphabet.compile_feats(self.feats)
+        self._extension_str = None
+        self._extension_size = None
+
+    @property
+    def extension_str(self):
+        # computed lazily, and recomputed if the alphabet has grown since
+        if self._extension_str is None or self._extension_size != len(self.alphabet.id_to_segment):
+            self._extension_size = len(self.alphabet.id_to_segment)
+            self._extension_str = '{' + ','.join(sorted(f'{seg}' for seg in self.alphabet.extension(self))) + '}'
+        return self._extension_str
 
     def add_feat(self, feat):
         self.feats.add(feat)
@@ -47,7 +57,12 @@ class NaturalClass:
             return False
         if len(item) > 1 and item[-1] not in {PRIMARY_STRESS, SECONDARY_STRESS}:
             return False
-        return self.alphabet.feat_vals(f'{item}').intersection(self.feats) == self.feats
+        if self._masks is None:
+            self.alphabet.feat_bits(f'{item}') # raises a KeyError for segments not in the alphabet
+            return False
+        plus, minus, unspec = self.alphabet.feat_bits(f'{item}')
+        req_plus, req_minus, req_unspec = self._masks
+        return plus & req_plus == req_plus and minus & req_minus == req_minus and unspec & req_unspec == req_unspec
 
     def __len__(self):
         return len(self.feats)
@@ -0,0 +1,110 @@
+from array import array
+from form import Form, CompactForm
+from lexicon import Lexicon
+from morpheme import Morpheme
+from sequence import FrozenSequence
+
+'''
+Packs a Lexicon into arrays of segment ids and counts, which are much cheaper to pickle than Forms and Morphemes,
+and rebuilds it on another alphabet without re-tokenizing its forms (e.g., to merge lexicons built in other processes).
+'''
+
+def pack(lexicon):
+    '''
+    :return: the segments used by :lexicon: (as {id: (IPA, feature vector)}), its forms (as (segment ids laid out as in CompactForm,
+        None, analysis, token count), or (None, (form, segmentation), analysis, token count) for forms that cannot be compacted)
+        and its morphemes (as (feat, [(allomorph ids, or string, count), ...])), in the order they were added
+    '''
+    def _ids(s):
+        return s.ids() if s != '' else array('H') # the allomorph of a null morpheme is ''
+
+    used = set()
+    forms = list()
+    for form in lexicon.forms:
+        analysis = '-'.join(form.analysis)
+        count = lexicon._token_counts.get(form, 1)
+        try:
+            if type(form) is CompactForm:
+                ids = form._ids
+            else:
+                parts = [form.form] + form.segmentation
+                ids = array('H', [len(parts)] + [len(part) for part in parts])
+                for part in parts:
+                    ids.extend(_ids(part))
+        except (KeyError, AttributeError): # a segment outside of the alphabet
+            forms.append((None, (f'{form.form}', '-'.join(f'{s}' for s in form.segmentation)), analysis, count))
+            continue
+        used.update(ids[1 + ids[0]:])
+        forms.append((ids, None, analysis, count))
+
+    def _allomorph(s):
+        try:
+            return _ids(s)
+        except (KeyError, AttributeError): # only in forms that cannot be compacted
+            return f'{s}'
+
+    morphemes = [(morph.feat, [(_allomorph(s), count) for s, count in morph._forms.items()]) for morph in lexicon.morphemes]
+    id_to_segment = lexicon.alphabet.id_to_segment
+    segments = {seg_id: (f'{id_to_segment[seg_id]}', list(id_to_segment[seg_id].feature_vec)) for seg_id in used}
+    return segments, forms, morphemes
+
+def unpack(packed, like):
+    '''
+    :return: a lazy Lexicon with the forms and morpheme counts of :packed: (see pack), and the alphabet and settings of the Lexicon :like:.
+        Forms are rebuilt from their segment ids (mapped onto :like:'s alphabet, see Alphabet.id_map) rather than re-tokenized.
+    '''
+    segments, forms, morphemes = packed
+    token_freq, compact = like.token_freq, like.compact
+    alphabet = like.alphabet
+    id_map = alphabet.id_map(segments)
+    table = None # old id -> new id, if any differ
+    if any(old != new for old, new in id_map.items()):
+        table = [0] * (max(id_map) + 1)
+        for old, new in id_map.items():
+            table[old] = new
+
+    def _remap(ids, start):
+        if table is None:
+            return ids
+        res = array('H', ids[:start])
+        res.extend([table[i] for i in ids[start:]])
+        return res
+
+    lexicon = Lexicon(token_freq=token_freq, compact=compact, lazy=True, alphabet=alphabet) # so that the forms can be merged into :like: as they are
+    morphs = dict() # the bytes of an allomorph's segment ids (or its string) -> its Sequence, shared with the forms
+    for ids, raw, analysis, count in forms:
+        if ids is None:
+            obj = Form(form=raw[0], segmentation=raw[1], analysis=analysis, alphabet=alphabet)
+            if compact:
+                obj = obj.compact()
+            for s in ([obj.form] if obj.is_stem else obj.segmentation):
+                morphs.setdefault(f'{s}', s)
+        else:
+            obj = CompactForm.from_ids(_remap(ids, 1 + ids[0]), analysis.split('-'), alphabet)
+            if compact:
+                for s in ([obj.form] if obj.is_stem else obj.segmentation):
+                    morphs.setdefault(s.ids().tobytes(), s)
+            else:
+                obj = obj.expand(morphs)
+        lexicon.forms[obj] = obj
+        lexicon._raw_forms[f'{obj.form}\t{analysis}'] = obj
+        if token_freq:
+            lexicon._token_counts[obj] = count
+
+    id_to_segment = alphabet.id_to_segment
+    def _allomorph(s):
+        if type(s) is str:
+            return morphs[s]
+        s = _remap(s, 0)
+        key = s.tobytes()
+        if key not in morphs: # an allomorph of no form
+            morphs[key] = FrozenSequence([id_to_segment[i] for i in s], alphabet)
+        return morphs[key]
+
+    for feat, allomorphs in morphemes:
+        (s, count), *allomorphs = allomorphs
+        morph = Morpheme(form=_allomorph(s), feat=feat, count=count, lazy=True)
+        for s, count in allomorphs:
+            morph.add_form(_allomorph(s), count=count)
+        lexicon.add_morpheme(morph)
+    return lexicon
@@ -0,0 +1,89 @@
+import os
+import time
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
+from lexicon import Lexicon
+from packing import pack, unpack
+
+'''
+Ingests a corpus file with a pool of processes: the file is split into byte ranges (on line boundaries),
+each worker ingests its range into a partial (lazy) Lexicon, and the partial lexicons are merged in file order,
+so that the result matches Lexicon.ingest. URs are computed once, after the last merge.
+
+Partial lexicons are sent back as arrays of segment ids and counts (see packing.pack), which are much cheaper to pickle than Forms and Morphemes,
+and are rebuilt without re-tokenizing them.
+'''
+
+def shard_ranges(path, n):
+    '''
+    :path: a path to a corpus file with a header line
+    :n: the number of shards
+
+    :return: the header line and a list of (up to) :n: (start, end) byte ranges that cover the remaining lines,
+        each starting at the beginning of a line
+    '''
+    with open(path, 'rb') as f:
+        header = f.readline()
+        start = f.tell()
+        size = os.fstat(f.fileno()).st_size
+        bounds = [start]
+        for i in range(1, n):
+            f.seek(max(start + (size - start) * i // n, bounds[-1]))
+            if f.tell() > start:
+                f.readline() # advance to the next line
+            bounds.append(min(f.tell(), size))
+        bounds.append(size)
+    ranges = [(lo, hi) for lo, hi in zip(bounds, bounds[1:]) if lo < hi]
+    return header.decode('utf-8'), ranges
+
+def read_range(path, start, end, buffer_size=1 << 20):
+    '''
+    :start, end: a byte range of :path: from shard_ranges
+
+    Lazily yields the lines of the range, so that a shard never has to be held in memory.
+    '''
+    with open(path, 'rb', buffering=buffer_size) as f:
+        f.seek(start)
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            yield line.decode('utf-8')
+
+def _ingest_shard(args):
+    path, header, start, end, ipa_file, token_freq, sep = args
+    lexicon = Lexicon(ipa_file=ipa_file, token_freq=token_freq, lazy=True)
+    stats = lexicon.ingest(chain([header], read_range(path, start, end)), sep=sep)
+    return pack(lexicon), stats
+
+def parallel_ingest(path, ipa_file='../data/ipa.txt', processes=None, token_freq=False, compact=False, lazy=False, sep='\t'):
+    '''
+    :path: a path to a corpus file in the format of data/morpho.txt
+    :processes: the number of worker processes (and shards); defaults to the number of cores
+    :token_freq, compact, lazy: as in Lexicon
+
+    :return: the Lexicon, the same as that of Lexicon.ingest(:path:), and a dict of stats as returned by Lexicon.ingest
+    '''
+    start = time.perf_counter()
+    processes = processes or os.cpu_count() or 1
+    header, ranges = shard_ranges(path, processes)
+    jobs = [(path, header, lo, hi, ipa_file, token_freq, sep) for lo, hi in ranges]
+    lexicon = Lexicon(ipa_file=ipa_file, token_freq=token_freq, compact=compact, lazy=True)
+    stats = dict()
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        for packed, shard_stats in pool.map(_ingest_shard, jobs): # in file order
+            lexicon.merge(unpack(packed, lexicon))
+            for key, val in shard_stats.items():
+                if key.startswith('skipped') or key == 'rows':
+                    stats[key] = stats.get(key, 0) + val
+
+    # compute the URs once, now that all counts are in
+    lexicon.lazy = lazy
+    for morph in lexicon.morphemes:
+        morph.lazy = lazy
+        if not lazy and morph._dirty:
+            morph.update_ur()
+    stats['added'] = len(lexicon)
+    stats['seconds'] = time.perf_counter() - start
+    stats['rows_per_sec'] = stats.get('rows', 0) / stats['seconds'] if stats['seconds'] > 0 else 0.0
+    return lexicon, stats
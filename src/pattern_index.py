@@ -0,0 +1,137 @@
+import re
+import numpy as np
+from natural_class import NaturalClass
+from sequence import Sequence
+from utils import LEFT_WORD_BOUNDARY, RIGHT_WORD_BOUNDARY
+
+'''
+Indexed search for Sequence patterns over the forms of a Lexicon.
+'''
+
+WILDCARD = '*'
+WORD_BOUNDARY = '#' # as in Sequence.windows; at the start (end) of a pattern, anchors it to the start (end) of the form
+
+class PatternIndex:
+    '''
+    A positional inverted index of the segments of a Lexicon's forms:
+    the forms' segment ids are concatenated into one array, and, for each segment id, the positions at which it occurs are listed.
+
+    A pattern is compiled into a segment-id mask for each of its positions (see Sequence.matches for what each element matches);
+    the candidate occurances are read off the postings of its most selective position, and only those are checked against the other positions.
+
+    The index is a snapshot of the lexicon's forms; build a new one after adding or removing forms.
+    '''
+    def __init__(self, lexicon):
+        self.alphabet = lexicon.alphabet
+        self.forms = list(lexicon.forms)
+        lengths = np.zeros(len(self.forms), dtype=np.int64)
+        chunks = list()
+        for i, form in enumerate(self.forms):
+            ids = form.form.ids()
+            chunks.append(np.asarray(ids, dtype=np.uint16))
+            lengths[i] = len(ids)
+        self.ids = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.uint16)
+        self.ends = np.cumsum(lengths)
+        self.starts = self.ends - lengths
+        self.owner = np.repeat(np.arange(len(self.forms)), lengths) # position -> form index
+        # postings: the positions of segment id k are self._order[self._bounds[k]:self._bounds[k + 1]], in increasing order
+        self._n = n = len(self.alphabet.id_to_segment) # segments added later cannot occur in the indexed forms
+        self._order = np.argsort(self.ids, kind='stable')
+        self._bounds = np.searchsorted(self.ids[self._order], np.arange(n + 1))
+        self._counts = np.diff(self._bounds)
+
+    def __len__(self):
+        return len(self.forms)
+
+    def _element_mask(self, elem):
+        '''
+        :return: a boolean array, indexed by segment id, of the indexed segments that :elem: matches, or None if it is a wildcard
+        '''
+        segs = self.alphabet.id_to_segment[:self._n]
+        typ = type(elem)
+        if typ is str and elem == WILDCARD:
+            return None
+        if typ is set or typ is NaturalClass:
+            return np.array([seg in elem for seg in segs], dtype=bool)
+        return np.array([f'{seg}' == f'{elem}' for seg in segs], dtype=bool)
+
+    def _tokens(self, pattern):
+        if type(pattern) is not str:
+            return list(pattern.seq if isinstance(pattern, Sequence) else pattern)
+        tokens = list()
+        for piece in re.split(f'([{re.escape(WILDCARD + WORD_BOUNDARY)}])', pattern):
+            if piece in {WILDCARD, WORD_BOUNDARY}:
+                tokens.append(piece)
+            elif piece:
+                tokens.extend(self.alphabet.tokenize(piece))
+        return tokens
+
+    def compile(self, pattern):
+        '''
+        :pattern: a Sequence (or list) of segments, sets of segments, NaturalClasses and wildcards ('*'),
+            optionally starting and/or ending with a word boundary ('#'), or a string of them
+
+        :return: (masks, anchored_left, anchored_right), where masks holds the output of _element_mask for each position of the pattern
+        '''
+        tokens = self._tokens(pattern)
+        boundary = lambda tok: type(tok) is not set and type(tok) is not NaturalClass and f'{tok}' in {WORD_BOUNDARY, LEFT_WORD_BOUNDARY, RIGHT_WORD_BOUNDARY}
+        anchored_left = len(tokens) > 0 and boundary(tokens[0])
+        if anchored_left:
+            tokens = tokens[1:]
+        anchored_right = len(tokens) > 0 and boundary(tokens[-1])
+        if anchored_right:
+            tokens = tokens[:-1]
+        if any(boundary(tok) for tok in tokens):
+            raise ValueError(f'Word boundaries can only be at the edges of a pattern: {pattern}')
+        return [self._element_mask(tok) for tok in tokens], anchored_left, anchored_right
+
+    def _match_starts(self, pattern):
+        # the global positions at which the pattern starts
+        masks, anchored_left, anchored_right = self.compile(pattern)
+        k = len(masks)
+        fixed = [i for i, mask in enumerate(masks) if mask is not None]
+        pivot = None
+        if fixed:
+            pivot = min(fixed, key=lambda i: self._counts[masks[i]].sum())
+            hits = [self._order[self._bounds[seg_id]:self._bounds[seg_id + 1]] for seg_id in np.flatnonzero(masks[pivot])]
+            cand = np.sort(np.concatenate(hits)) if hits else np.zeros(0, dtype=np.int64)
+            owner = self.owner[cand]
+            cand = cand - pivot
+        else: # only wildcards: every start
+            per_form = self.ends - self.starts + 1
+            owner = np.repeat(np.arange(len(self.forms)), per_form)
+            cand = self.starts[owner] + np.arange(len(owner)) - np.repeat(np.cumsum(per_form) - per_form, per_form)
+        # the pattern must fit within the form
+        keep = (cand >= self.starts[owner]) & (cand + k <= self.ends[owner])
+        if anchored_left:
+            keep &= cand == self.starts[owner]
+        if anchored_right:
+            keep &= cand + k == self.ends[owner]
+        cand, owner = cand[keep], owner[keep]
+        for i in fixed: # verify the other positions
+            if i == pivot:
+                continue
+            keep = masks[i][self.ids[cand + i]]
+            cand, owner = cand[keep], owner[keep]
+        return cand, owner
+
+    def search(self, pattern):
+        '''
+        :pattern: as in compile
+
+        :return: a list of (Form, i) for every occurance of :pattern: in a form, starting at its position i, in the order of the forms
+        '''
+        cand, owner = self._match_starts(pattern)
+        return [(self.forms[f], int(s - self.starts[f])) for s, f in zip(cand.tolist(), owner.tolist())]
+
+    def count(self, pattern):
+        '''
+        :return: the number of occurances of :pattern: in the forms
+        '''
+        return len(self._match_starts(pattern)[0])
+
+    def forms_matching(self, pattern):
+        '''
+        :return: the list of forms in which :pattern: occurs, in the order of the forms
+        '''
+        return [self.forms[f] for f in np.unique(self._match_starts(pattern)[1]).tolist()]
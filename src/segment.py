@@ -1,6 +1,8 @@
 from natural_class import NaturalClass
 
 class Segment:
+    __slots__ = ('ipa', 'feature_vec', 'stress', '_str', '_hashable')
+
     def __init__(self, ipa, feature_vec=[], nas_vowel=False, stress=None):
         self.ipa = ipa
         self.feature_vec = feature_vec
@@ -1,8 +1,7 @@
+from array import array
 from natural_class import NaturalClass
 from segment import Segment
 
-from utils import PRIMARY_STRESS, SECONDARY_STRESS, LEFT_WORD_BOUNDARY, RIGHT_WORD_BOUNDARY, SYLLABLE_BOUNDARY, EMPTY_STRING
-
 class Sequence:
     '''
     A class representing a sequence of Segments, sets of Segments, or Natural Classes.
@@ -14,24 +13,12 @@ class Sequence:
 
     Also handles wildcards, '*'
     '''
+    __slots__ = ('alphabet', 'seq')
+
     def __init__(self, seq, alphabet=None):
         self.alphabet = alphabet
         if type(seq) == str:
-            if alphabet is None:
-                seq = list(seq)
-            else:
-                temp = str(seq)
-                seq = list()
-                for i in range(len(temp)):
-                    if temp[i] not in {PRIMARY_STRESS, SECONDARY_STRESS, LEFT_WORD_BOUNDARY, RIGHT_WORD_BOUNDARY, SYLLABLE_BOUNDARY, EMPTY_STRING, '\u0303'}:
-                        seq.append(alphabet[temp[i]])
-                    elif temp[i] in {LEFT_WORD_BOUNDARY, RIGHT_WORD_BOUNDARY, SYLLABLE_BOUNDARY, EMPTY_STRING}:
-                        seq.append(Segment(temp[i]))
-                    elif temp[i] == '\u0303': # nasalized
-                        seq[-1] = alphabet.with_feats(seq[-1], 'nas')
-                    else:
-                        seq[-1] = alphabet[f'{seq[-1]}{temp[i]}']
-                        seq[-1].set_stress(temp[i])
+            seq = list(seq) if alphabet is None else alphabet.tokenize(seq)
         elif type(seq) == Segment:
             assert(len(seq) == 1)
             seq = [seq]
@@ -40,10 +27,40 @@ class Sequence:
     def copy(self):
         return Sequence(list(self.seq), self.alphabet)
 
+    def freeze(self):
+        '''
+        :return: a FrozenSequence of the same segments
+        '''
+        return FrozenSequence(list(self.seq), self.alphabet)
+
+    def compact(self):
+        '''
+        :return: a CompactSequence of the same segments, or self if they are not all segments of self.alphabet
+        '''
+        if self.alphabet is None:
+            return self
+        ids = list()
+        for seg in self.seq:
+            if type(seg) is not Segment or self.alphabet.ipa_to_segment.get(seg.ipa) is not seg:
+                return self
+            ids.append(self.alphabet.ipa_to_id[seg.ipa])
+        return CompactSequence(array('H', ids), self.alphabet)
+
+    def ids(self):
+        '''
+        :return: the ids of the segments in self.alphabet, as an array; raises a KeyError for a segment outside of it
+        '''
+        ipa_to_id = self.alphabet.ipa_to_id
+        return array('H', [ipa_to_id[f'{seg}'] for seg in self.seq])
+
     def __len__(self):
         return len(self.seq)
 
     def __str__(self):
+        try: # fast path: only Segments
+            return ''.join([seg._str for seg in self.seq])
+        except AttributeError:
+            pass
         s = ''
         for seg in self.seq:
             if type(seg) is set:
@@ -184,13 +201,105 @@ class Sequence:
                 c += 1
         return c
 
-    def to_natural_classes(self, segments=True):
+    def to_natural_classes(self, segments=True, minimal=False):
+        '''
+        :segments: if True, also replace single segments with natural classes
+        :minimal: if True, use the smallest feature set that picks out exactly the segments (see Alphabet.minimal_natural_class),
+            falling back to all their shared features when there is none
+        '''
         if not self.alphabet:
             raise ValueError('Cannot construct Natural Classes without an alphabet.')
+
+        def _feats(segs):
+            if minimal:
+                feats = self.alphabet.minimal_natural_class(segs)
+                if feats is not None:
+                    return feats
+            return self.alphabet.shared_feats(segs)
+
         for idx in range(len(self.seq)):
             seg = self.seq[idx]
             if type(seg) is str or type(seg) is Segment:
                 if segments:
-                    self.seq[idx] = NaturalClass(self.alphabet.shared_feats({seg}), self.alphabet)
+                    self.seq[idx] = NaturalClass(_feats({seg}), self.alphabet)
             elif type(seg) is set:
-                self.seq[idx] = NaturalClass(self.alphabet.shared_feats(seg), self.alphabet)
+                self.seq[idx] = NaturalClass(_feats(seg), self.alphabet)
+
+
+class FrozenSequence(Sequence):
+    '''
+    An immutable Sequence, whose string and hash are computed once at construction,
+    so that dict and set operations on Forms and Morphemes do not re-render it on every probe.
+
+    Construct like a Sequence, or with Sequence.freeze(); copy() returns an ordinary (mutable) Sequence.
+    '''
+    __slots__ = ('_str', '_hash')
+
+    def __init__(self, seq, alphabet=None):
+        super().__init__(seq, alphabet)
+        self._str = super().__str__()
+        self._hash = hash(self._str)
+
+    def __str__(self):
+        return self._str
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if type(other) is FrozenSequence:
+            if self._hash != other._hash or self._str != other._str:
+                return False
+            return all(seg is other_seg or seg == other_seg for seg, other_seg in zip(self.seq, other.seq))
+        if type(other) is str:
+            return self._str == other
+        return super().__eq__(other)
+
+    def __lt__(self, other):
+        return self._str < other.__str__()
+
+    def _immutable(self, *args):
+        raise TypeError('FrozenSequence is immutable; use copy() for a mutable Sequence.')
+
+    __setitem__ = __iadd__ = merge = to_natural_classes = _immutable
+
+class CompactSequence(Sequence):
+    '''
+    An immutable Sequence of alphabet Segments, stored as an array of segment ids (two bytes per segment)
+    rather than a list of references. Segments are materialized from alphabet.id_to_segment on access.
+
+    Construct with Sequence.compact(); copy() returns an ordinary (mutable) Sequence.
+    '''
+    __slots__ = ('_ids',)
+
+    def __init__(self, ids, alphabet):
+        self.alphabet = alphabet
+        self._ids = ids
+
+    @property
+    def seq(self):
+        return [self.alphabet.id_to_segment[i] for i in self._ids]
+
+    def ids(self):
+        return self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __str__(self):
+        id_to_segment = self.alphabet.id_to_segment
+        return ''.join(id_to_segment[i]._str for i in self._ids)
+
+    def __iter__(self):
+        id_to_segment = self.alphabet.id_to_segment
+        return (id_to_segment[i] for i in self._ids)
+
+    def __getitem__(self, idx):
+        if type(idx) is int:
+            return self.alphabet.id_to_segment[self._ids[idx]]
+        return super().__getitem__(idx)
+
+    def _immutable(self, *args):
+        raise TypeError('CompactSequence is immutable; use copy() for a mutable Sequence.')
+
+    __setitem__ = __iadd__ = merge = to_natural_classes = _immutable
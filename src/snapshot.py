@@ -0,0 +1,274 @@
+import json
+import mmap
+import struct
+from array import array
+from sys import intern
+import numpy as np
+from alphabet import Alphabet
+from form import CompactForm
+from lexicon import Lexicon
+from morpheme import Morpheme
+from sequence import CompactSequence, Sequence
+
+'''
+A versioned binary format for learned Lexicons, which can be opened with mmap and materialized lazily.
+
+The file starts with a header (MAGIC, the version, and the number of sections), followed by a table of
+(name, offset, # bytes) for each section. Sections are 8-byte aligned, and arrays are little-endian:
+    alphabet        JSON of Alphabet.to_table(), including learned underspecified segments
+    strings         JSON list of the interned analyses and morpheme features
+    meta            JSON of the Lexicon's settings and sizes
+    form_off        uint64, (# forms + 1) offsets into form_ids
+    form_ids        uint16, each form's segment ids, laid out as in CompactForm
+    form_analysis   uint32, the index in strings of each form's analysis
+    form_count      uint64, the token count of each form
+    morph_feat      uint32, the index in strings of each morpheme's feature ('Stem' for stems)
+    morph_flags     uint8, bit 0 if the morpheme is concrete, bit 1 if it is null
+    morph_off       uint64, (# morphemes + 1) offsets into the allomorph arrays
+    allo_off        uint64, (# allomorphs + 1) offsets into allo_ids
+    allo_ids        uint16, each allomorph's segment ids
+    allo_count      uint64, each allomorph's count
+    ur_off          uint64, (# morphemes + 1) offsets into ur_ids
+    ur_ids          uint16, the segment ids of each abstract UR (empty for concrete morphemes, whose UR is their most frequent allomorph)
+'''
+
+MAGIC = b'ULEXSNAP'
+SNAPSHOT_VERSION = 1
+CONCRETE, NULL = 1, 2
+
+_HEADER = struct.Struct('<8sII')
+_SECTION = struct.Struct('<16sQQ')
+_ARRAYS = {'form_off': '<u8', 'form_ids': '<u2', 'form_analysis': '<u4', 'form_count': '<u8',
+           'morph_feat': '<u4', 'morph_flags': 'u1', 'morph_off': '<u8',
+           'allo_off': '<u8', 'allo_ids': '<u2', 'allo_count': '<u8', 'ur_off': '<u8', 'ur_ids': '<u2'}
+
+def _ids(seq, alphabet):
+    try:
+        return (seq if isinstance(seq, Sequence) else Sequence(seq, alphabet)).ids()
+    except KeyError as e:
+        raise ValueError(f'Cannot snapshot {seq}, which has a segment ({e}) outside of the alphabet')
+
+def save_lexicon(lexicon, path):
+    '''
+    :lexicon: a Lexicon whose forms are made of alphabet segments (i.e., can be compacted)
+    :path: the file to write
+
+    Writes a snapshot of :lexicon:, computing the URs of any lazy morphemes first.
+    '''
+    morphs = list(lexicon.morphemes)
+    urs = [(f'{morph.form}', morph.concrete, morph.null) for morph in morphs] # may add underspecified segments, so before the alphabet
+    alphabet = lexicon.alphabet
+    strings = dict()
+    def _string(s):
+        return strings.setdefault(s, len(strings))
+
+    form_ids, form_off, form_analysis, form_count = array('H'), [0], list(), list()
+    for form in lexicon.forms:
+        compact = form if type(form) is CompactForm else form.compact()
+        if type(compact) is not CompactForm:
+            raise ValueError(f'Cannot snapshot {form}, which has segments outside of the alphabet')
+        form_ids.extend(compact._ids)
+        form_off.append(len(form_ids))
+        form_analysis.append(_string('-'.join(form.analysis)))
+        form_count.append(lexicon._token_counts.get(form, 1))
+
+    morph_feat, morph_flags, morph_off = list(), list(), [0]
+    allo_ids, allo_off, allo_count = list(), [0], list()
+    ur_ids, ur_off = list(), [0]
+    for morph, (ur, concrete, null) in zip(morphs, urs):
+        morph_feat.append(_string(morph.feat))
+        morph_flags.append((CONCRETE if concrete else 0) | (NULL if null else 0))
+        for allomorph, count in morph._forms.items():
+            allo_ids.extend(_ids(allomorph, alphabet))
+            allo_off.append(len(allo_ids))
+            allo_count.append(count)
+        morph_off.append(len(allo_count))
+        if not concrete:
+            ur_ids.extend(_ids(alphabet.tokenize(ur), alphabet))
+        ur_off.append(len(ur_ids))
+
+    meta = {'token_freq': lexicon.token_freq, 'compact': lexicon.compact, 'lazy': lexicon.lazy,
+            'forms': len(form_analysis), 'morphemes': len(morph_feat)}
+    arrays = {'form_off': form_off, 'form_ids': form_ids, 'form_analysis': form_analysis, 'form_count': form_count,
+              'morph_feat': morph_feat, 'morph_flags': morph_flags, 'morph_off': morph_off,
+              'allo_off': allo_off, 'allo_ids': allo_ids, 'allo_count': allo_count, 'ur_off': ur_off, 'ur_ids': ur_ids}
+    sections = [('alphabet', json.dumps(alphabet.to_table(), ensure_ascii=False).encode('utf-8')),
+                ('strings', json.dumps(list(strings), ensure_ascii=False).encode('utf-8')),
+                ('meta', json.dumps(meta).encode('utf-8'))]
+    sections += [(name, np.asarray(arrays[name], dtype=dtype).tobytes()) for name, dtype in _ARRAYS.items()]
+
+    offset = _HEADER.size + _SECTION.size * len(sections)
+    table = list()
+    for name, data in sections:
+        offset += -offset % 8
+        table.append((name, offset, len(data)))
+        offset += len(data)
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, SNAPSHOT_VERSION, len(sections)))
+        for name, offset, size in table:
+            f.write(_SECTION.pack(name.encode('ascii'), offset, size))
+        for (name, data), (_, offset, _) in zip(sections, table):
+            f.write(b'\0' * (offset - f.tell()))
+            f.write(data)
+
+class LexiconSnapshot:
+    '''
+    A read-only view of a snapshot written by save_lexicon. Opening one only maps the file and rebuilds the alphabet;
+    forms and morphemes are materialized from the mapped arrays when they are accessed, and to_lexicon materializes all of them.
+
+    Usable as a context manager, which closes the file on exit.
+    '''
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n_sections = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f'{path} is not a Lexicon snapshot')
+        if version != SNAPSHOT_VERSION:
+            self.close()
+            raise ValueError(f'{path} is a version {version} snapshot, but only version {SNAPSHOT_VERSION} is supported')
+        sections = dict()
+        for i in range(n_sections):
+            name, offset, size = _SECTION.unpack_from(self._mmap, _HEADER.size + i * _SECTION.size)
+            sections[name.rstrip(b'\0').decode('ascii')] = (offset, size)
+
+        def _json(name):
+            offset, size = sections[name]
+            return json.loads(self._mmap[offset:offset + size].decode('utf-8'))
+        self.alphabet = Alphabet.from_table(_json('alphabet'))
+        self.strings = _json('strings')
+        self.meta = _json('meta')
+        for name, dtype in _ARRAYS.items(): # views of the mapped file, not copies
+            offset, size = sections[name]
+            setattr(self, f'_{name}', np.frombuffer(self._mmap, dtype=dtype, count=size // np.dtype(dtype).itemsize, offset=offset))
+        self._analyses = dict() # strings index -> list of interned labels
+        self._morphemes = dict() # morpheme index -> Morpheme
+        self._index = None # affix feature or stem string -> morpheme index, built on first lookup
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        for name in _ARRAYS:
+            setattr(self, f'_{name}', None)
+        if self._mmap is not None:
+            self._mmap.close()
+            self._file.close()
+            self._mmap = None
+
+    def __len__(self):
+        return self.meta['forms']
+
+    def _array(self, ids):
+        return array('H', ids.tobytes())
+
+    def form(self, i):
+        '''
+        :return: the :i:th form of the lexicon, as a CompactForm
+        '''
+        analysis = int(self._form_analysis[i])
+        if analysis not in self._analyses:
+            self._analyses[analysis] = [intern(a) for a in self.strings[analysis].split('-')]
+        form = object.__new__(CompactForm)
+        form.alphabet = self.alphabet
+        form.analysis = self._analyses[analysis]
+        form.is_stem = form.analysis == ['Stem']
+        form.is_affix = not form.is_stem
+        form._ids = self._array(self._form_ids[self._form_off[i]:self._form_off[i + 1]])
+        return form
+
+    def forms(self):
+        '''
+        :return: a generator of the forms of the lexicon, in the order they were added
+        '''
+        return (self.form(i) for i in range(len(self)))
+
+    def _allomorph(self, j):
+        ids = self._allo_ids[self._allo_off[j]:self._allo_off[j + 1]]
+        return CompactSequence(self._array(ids) if len(ids) else array('H'), self.alphabet)
+
+    def morpheme(self, i):
+        '''
+        :return: the :i:th morpheme of the lexicon, with its saved counts and UR
+        '''
+        if i in self._morphemes:
+            return self._morphemes[i]
+        lazy = self.meta['lazy']
+        allomorphs = range(self._morph_off[i], self._morph_off[i + 1])
+        morph = Morpheme(form=self._allomorph(allomorphs[0]), feat=self.strings[self._morph_feat[i]],
+                         count=int(self._allo_count[allomorphs[0]]), lazy=True)
+        for j in allomorphs[1:]:
+            morph.add_form(self._allomorph(j), count=int(self._allo_count[j]))
+        # restore the saved UR rather than recomputing it
+        flags = int(self._morph_flags[i])
+        morph._dirty = False
+        morph.concrete = bool(flags & CONCRETE)
+        morph.form = morph._argmax if morph.concrete else ''.join(f'{self.alphabet.id_to_segment[seg_id]}' for seg_id in self._ur_ids[self._ur_off[i]:self._ur_off[i + 1]])
+        morph.null = bool(flags & NULL)
+        morph.lazy = lazy
+        self._morphemes[i] = morph
+        return morph
+
+    def morphemes(self):
+        '''
+        :return: a generator of the morphemes of the lexicon, in the order they were added
+        '''
+        return (self.morpheme(i) for i in range(self.meta['morphemes']))
+
+    def __getitem__(self, key):
+        '''
+        :key: an affix feature (e.g., 'pl') or a stem string
+
+        :return: the Morpheme
+        '''
+        if self._index is None:
+            self._index = dict()
+            stem = self.strings.index('Stem') if 'Stem' in self.strings else -1
+            for i, feat in enumerate(self._morph_feat.tolist()):
+                self._index[f'{self._allomorph(self._morph_off[i])}' if feat == stem else self.strings[feat]] = i
+        if key not in self._index:
+            raise KeyError(f'KeyError: {key} not in the Lexicon.')
+        return self.morpheme(self._index[key])
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def to_lexicon(self):
+        '''
+        :return: a Lexicon equal to the one that was saved, sharing this snapshot's alphabet
+        '''
+        lexicon = Lexicon(token_freq=self.meta['token_freq'], compact=self.meta['compact'], lazy=self.meta['lazy'], alphabet=self.alphabet)
+        morphs = dict() # allomorph string -> its Sequence, shared with the forms
+        for i, form in enumerate(self.forms()):
+            if not lexicon.compact:
+                form = form.expand()
+            lexicon.forms[form] = form
+            lexicon._raw_forms[f'{form.form}\t{"-".join(form.analysis)}'] = form
+            if lexicon.token_freq:
+                lexicon._token_counts[form] = int(self._form_count[i])
+            for s in ([form.form] if form.is_stem else form.segmentation):
+                morphs.setdefault(f'{s}', s)
+        for morph in self.morphemes():
+            # use the forms' sequences as allomorph keys, as Lexicon.add_form does
+            morph._forms = type(morph._forms)(int, ((morphs.get(f'{s}', s), count) for s, count in morph._forms.items()))
+            morph._argmax = morphs.get(morph._argmax_str, morph._argmax)
+            if morph.concrete:
+                morph.form = morph._argmax
+            lexicon.add_morpheme(morph)
+        self._morphemes = dict() # now owned by the lexicon
+        return lexicon
+
+def load_lexicon(path):
+    '''
+    :return: the Lexicon saved to :path: by save_lexicon, fully materialized
+    '''
+    with LexiconSnapshot(path) as snapshot:
+        return snapshot.to_lexicon()
@@ -1,3 +1,4 @@
+import os
 from itertools import chain, combinations
 import numpy as np
 
@@ -25,6 +26,61 @@ def load(fname, sep='\t', skip_header=False):
             freqs.append(freq)
     return words, freqs
 
+CORPUS_COLUMNS = ('SF', 'Segmentation', 'Analysis', 'Freq')
+
+def stream_corpus(source, sep='\t', skip_header=True, buffer_size=1 << 20, stats=None):
+    '''
+    :source: a path to a corpus file (e.g., ../data/morpho.txt) or an iterable of lines
+    :sep: the column separator
+    :skip_header: if True, the first line is treated as a header and used to locate the columns
+    :buffer_size: the read buffer size (in bytes) when :source: is a path
+    :stats: an optional dict, into which counts of read and skipped (malformed) rows are accumulated
+
+    Lazily yields (form, segmentation, analysis, freq) tuples, one per well-formed row, so that
+    arbitrarily large corpora never have to be held in memory.
+    The default column layout is that of data/morpho.txt and data/childes.txt (SF, Word, Segmentation, Analysis, Freq).
+    '''
+    if stats is None:
+        stats = dict()
+    for key in ('rows', 'skipped_columns', 'skipped_segmentation', 'skipped_freq'):
+        stats.setdefault(key, 0)
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'r', encoding='utf-8', buffering=buffer_size) as f:
+            yield from stream_corpus(f, sep=sep, skip_header=skip_header, stats=stats)
+        return
+
+    lines = iter(source)
+    sf_idx, seg_idx, an_idx, freq_idx = 0, 2, 3, 4
+    if skip_header:
+        header = next(lines, None)
+        if header is None:
+            return
+        header = header.rstrip('\r\n').split(sep)
+        if all(col in header for col in CORPUS_COLUMNS):
+            sf_idx, seg_idx, an_idx, freq_idx = (header.index(col) for col in CORPUS_COLUMNS)
+    n_cols = max(sf_idx, seg_idx, an_idx, freq_idx) + 1
+
+    for line in lines:
+        cols = line.rstrip('\r\n').split(sep)
+        if len(cols) < n_cols or not cols[sf_idx]:
+            if line.strip(): # blank lines are not counted as malformed
+                stats['skipped_columns'] += 1
+            continue
+        form, segmentation, analysis = cols[sf_idx], cols[seg_idx], cols[an_idx]
+        if segmentation.count('-') != analysis.count('-'):
+            stats['skipped_segmentation'] += 1
+            continue
+        try:
+            freq = int(cols[freq_idx])
+        except ValueError:
+            freq = 0
+        if freq < 1:
+            stats['skipped_freq'] += 1
+            continue
+        stats['rows'] += 1
+        yield form, segmentation, analysis, freq
+
 def tolerance_principle(n, c=None, e=None):
     if c is None and e is None:
         raise ValueError(f'c and e cannot both be None.')
@@ -54,18 +110,11 @@ def powerset(iterable, smallest=0, largest=None, proper_subset_only=False):
 def align_blanks(s1, s2, return_ties=False):
     '''
     Add blanks (EMPTY_STRING), so that s1 and s2 are optimaly aligned and of the same length.
-    Assumes that len(s1) < len(s2).
+    Assumes that len(s1) <= len(s2). Positions are compared by identity (as in Hamming distance),
+    and ties are broken towards the earliest blanks; see alignment.Aligner for feature-weighted alignment.
     '''
-    delta = len(s2) - len(s1)
-    options = sorted(insert_empty(s1, k=delta), key=lambda op: (hd(op, s2), op.index(EMPTY_STRING)))
-    if return_ties and len(options) > 1:
-        res = [options[0]]
-        i = 1
-        while i < len(options) and hd(options[i], s2) == hd(options[0], s2):
-            res.append(options[i])
-            i += 1
-        return res
-    return options[0]
+    from alignment import Aligner # imported here, as alignment imports utils
+    return Aligner().align_blanks(s1, s2, return_ties=return_ties)
 
 def longest_common_prefix(strings):
     lcp = ''
@@ -0,0 +1,42 @@
+import unittest
+import sys
+sys.path.append('../src/')
+from alphabet import Alphabet
+from alignment import Aligner
+from sequence import Sequence
+
+class TestAlignment(unittest.TestCase):
+    def setUp(self):
+        self.alphabet = Alphabet(ipa_file='../data/ipa.txt', add_segs=True)
+
+    def test_align(self):
+        aligner = Aligner()
+        assert(aligner.align('kitten', 'sitting') == ('kitten∅', 'sitting'))
+        assert(aligner.distance('kitten', 'sitting') == 3)
+        assert(aligner.align('', 'ab') == ('∅∅', 'ab'))
+        assert(aligner.align('ab', 'ab', return_ties=True) == [('ab', 'ab')])
+
+    def test_feature_weighted(self):
+        plain = Aligner(self.alphabet)
+        weighted = Aligner(self.alphabet, feature_weighted=True)
+        # by identity, o is as bad a substitute for ɑ as for r, but it is featurally closer to ɑ
+        assert(plain.align('lɑr', 'lo', return_ties=True) == [('lɑr', 'lo∅'), ('lɑr', 'l∅o')])
+        assert(weighted.align('lɑr', 'lo', return_ties=True) == [('lɑr', 'lo∅')])
+        assert(weighted.distance('lɑr', 'ler') < plain.distance('lɑr', 'ler'))
+        with self.assertRaises(ValueError):
+            Aligner(feature_weighted=True)
+
+    def test_sequences(self):
+        aligner = Aligner(self.alphabet, feature_weighted=True)
+        a1, a2 = aligner.align(Sequence('nin', self.alphabet), Sequence('in', self.alphabet))
+        assert([f'{seg}' for seg in a1] == ['n', 'i', 'n'])
+        assert([f'{seg}' for seg in a2] == ['∅', 'i', 'n'])
+
+    def test_batch(self):
+        aligner = Aligner(self.alphabet)
+        pairs = [('lr', 'lɑr'), ('in', 'nin'), ('lr', 'lɑr')]
+        assert(aligner.align_batch(pairs, blanks_only=True) == ['l∅r', '∅in', 'l∅r'])
+        assert(aligner.align_batch(pairs) == [aligner.align(s1, s2) for s1, s2 in pairs])
+
+if __name__ == "__main__":
+    unittest.main()
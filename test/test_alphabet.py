@@ -20,6 +20,18 @@ class TestAlphabet(unittest.TestCase):
         assert(alphabet[p.feature_vec].ipa == 'p')
         assert(alphabet[p] == p)
 
+    def test_getitem_2(self):
+        alphabet = Alphabet(add_segs=True)
+
+        b = alphabet['b']
+        assert(alphabet[tuple(b.feature_vec)] is b)
+        assert(tuple(b.feature_vec) in alphabet)
+        assert(b in alphabet)
+        vec = list(b.feature_vec)
+        vec[alphabet.feature_index['nas']] = '+'
+        assert(vec not in alphabet)
+        self.assertRaises(KeyError, alphabet.__getitem__, vec)
+
     def test_without_feats_1(self):
         alphabet = Alphabet(add_segs=True)
 
@@ -60,5 +72,88 @@ class TestAlphabet(unittest.TestCase):
         assert(alph.dissimilate('r', 'r', ('ant', 'lat')) == 'l')
         assert(alph.dissimilate('l', 'l', ('ant', 'lat')) == 'r')
 
+    def test_extension_1(self):
+        alph = Alphabet(ipa_file='../data/ipa.txt', add_segs=True)
+
+        assert(alph.extension({'+nas'}) == {'m', 'n'})
+        assert(alph.extension({'-cons', '+back', '+round', '+hi'}) == {'u'})
+        assert(alph.extension({'+voiced'}) == set())
+        assert(alph.extension_complement({'+nas'}) == alph.segments.difference({'m', 'n'}))
+
+    def test_shared_feats_1(self):
+        alph = Alphabet(ipa_file='../data/ipa.txt', add_segs=True)
+
+        assert(alph.shared_feats({'m', 'n'}) == alph.feat_vals('m', exclude_unspec=True).intersection(alph.feat_vals('n', exclude_unspec=True)))
+        assert('+nas' in alph.shared_feats({'m', 'n'}))
+        assert(alph.feat_diff('b', 'p') == {'voice'})
+
+    def test_minimal_natural_class_1(self):
+        alph = Alphabet(ipa_file='../data/ipa.txt', add_segs=True)
+
+        assert(alph.minimal_natural_class({'m', 'n'}) == {'+nas'})
+        assert(alph.minimal_natural_class({'i', 'y', 'e', 'ø'}) == {'-back'})
+        assert(len(alph.minimal_natural_class({'p', 't', 'k'})) < len(alph.shared_feats({'p', 't', 'k'})))
+        assert(alph.extension(alph.minimal_natural_class({'p', 't', 'k'})) == {'p', 't', 'k'})
+        assert(alph.minimal_natural_class({'i', 'p'}) is None)
+        feats = alph.minimal_natural_class({'m'}, universe={'m', 'n', 'p'})
+        assert(len(feats) == 2 and '+lab' in feats)
+
+        sizes = [len(feats) for feats in alph.natural_classes({'u'}, max_size=5)]
+        assert(sizes == sorted(sizes))
+
+        # the memo is dropped when a segment joins the class
+        vec = list(alph['m'].feature_vec)
+        vec[alph.feature_index['lab']] = '?'
+        alph.add_underspec(vec)
+        assert(alph.minimal_natural_class({'m', 'n'}) != {'+nas'})
+
+    def test_transition_tables_1(self):
+        alph = Alphabet(ipa_file='../data/ipa.txt', add_segs=True, transition_tables=True)
+
+        assert(alph.with_feats('p', 'voice') == 'b')
+        assert(alph.without_feats('b', 'voice') == 'p')
+        assert(alph.assimilate('I', 'ɯ', 'back') == 'ɯ')
+        assert(alph.assimilate('k', 'ɯ', 'back') == None)
+        assert(alph.dissimilate('r', 'r', ('ant', 'lat')) == 'l')
+        assert(alph.set_feats('p', ['voice'], ['+']) == 'b')
+
+        ids = [alph.seg_id(seg) for seg in 'pbm']
+        res = alph.apply_transition(ids, 'with_feats', feats='voice')
+        assert([f'{alph.id_to_segment[i]}' if i >= 0 else None for i in res] == ['b', None, None])
+
+    def test_transition_tables_invalidate(self):
+        alph = Alphabet(ipa_file='../data/ipa.txt', add_segs=True, transition_tables=True)
+
+        vec = list(alph['m'].feature_vec)
+        vec[alph.feature_index['lab']] = '?'
+        assert(alph.set_feats('m', ['lab'], ['?']) is None)
+        alph.add_underspec(vec)
+        assert(alph.set_feats('m', ['lab'], ['?']) == alph[vec])
+        assert(len(alph.transition_table('set_feats', feats=['lab'], vals=['?'])) == len(alph.id_to_segment))
+
+    def test_load_1(self):
+        a1 = Alphabet.load(ipa_file='../data/ipa.txt', add_segs=True)
+        a2 = Alphabet.load(ipa_file='../data/ipa.txt', add_segs=True)
+        assert(a1 is not a2)
+        assert(a1['b'] is a2['b'])
+        assert(f'{a1}' == f'{Alphabet(ipa_file="../data/ipa.txt", add_segs=True)}')
+
+        vec = list(a1['m'].feature_vec)
+        vec[a1.feature_index['lab']] = '?'
+        a1.add_underspec(vec)
+        assert(vec in a1)
+        assert(vec not in a2)
+        assert(len(a1.segments) == len(a2.segments) + 1)
+        assert(len(Alphabet.load(ipa_file='../data/ipa.txt', add_segs=True).segments) == len(a2.segments))
+
+    def test_copy_1(self):
+        alph = Alphabet(add_segs=False)
+        clone = alph.copy()
+        clone.add_segments_from_str('buz')
+        assert('b' in clone)
+        assert('b' not in alph)
+        alph.add_segment('p')
+        assert('p' not in clone)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
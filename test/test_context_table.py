@@ -0,0 +1,53 @@
+import unittest
+import sys
+sys.path.append('../src/')
+from lexicon import Lexicon
+from sequence import Sequence
+from natural_class import NaturalClass
+from context_table import extract_windows, render, ContextTable
+
+class TestContextTable(unittest.TestCase):
+    def setUp(self):
+        self.lexicon = Lexicon(ipa_file='../data/ipa.txt')
+        for form, seg, analysis in [('buzlɑr', 'buz-lɑr', 'Stem-pl'), ('eller', 'el-ler', 'Stem-pl'), ('jerlerin', 'jer-ler-in', 'Stem-pl-gen')]:
+            self.lexicon.add_form(form, seg, analysis)
+
+    def test_extract_windows_1(self):
+        alph = self.lexicon.alphabet
+        forms = list(self.lexicon.forms)
+        for k in (1, 2, 3):
+            windows = extract_windows(forms, alph, k)
+            for i, form in enumerate(forms):
+                seq = Sequence(list(form.form), alph)
+                for pos in range(len(seq)):
+                    rows = (windows['seq'] == i) & (windows['pos'] == pos)
+                    res = sorted((render(left, alph), render(right, alph)) for left, right in zip(windows['left'][rows], windows['right'][rows]))
+                    assert(res == [(f'{C}', f'{D}') for C, D in seq.windows(pos, k)])
+
+    def test_context_table_1(self):
+        table = ContextTable(self.lexicon, ks=(2, 3))
+        assert(table.contexts('r', 2) == {('e', ''): 3, ('', '#'): 2, ('ɑ', ''): 1, ('', 'l'): 1, ('', 'i'): 1})
+        assert(table.count('r', 3, ['l', 'e'], []) == 2)
+        assert(table.count('l', 3, ['#', 'e'], []) == 1)
+        assert(table.count('l', 2, [], ['ɑ']) == 1)
+
+        vowels = ContextTable(self.lexicon, ks=(3,), classes={'V': NaturalClass({'-cons'}, self.lexicon.alphabet)})
+        assert(vowels.count('V', 3, ['l'], ['r']) == 3)
+        assert(vowels.count('V', 3, ['#'], ['l']) == 1)
+        with self.assertRaises(ValueError):
+            vowels.count('V', 3, ['l'], [])
+
+    def test_count_boundaries(self):
+        table = ContextTable(self.lexicon, ks=(2, 3, 4))
+        assert(table.contexts('b', 3)[('#', '')] == 1)
+        assert(table.count('b', 3, ['#'], []) == 1)
+        # every context the table reports, including those at the first and last positions, can be counted
+        for (cls, k) in table.counts:
+            for (left, right), c in table.contexts(cls, k).items():
+                assert(table.count(cls, k, list(left), list(right)) == c)
+        assert(table.count('r', 3, ['ɑ'], ['#']) == 1)
+        with self.assertRaises(ValueError):
+            table.count('b', 3, [], ['u'])
+
+if __name__ == "__main__":
+    unittest.main()
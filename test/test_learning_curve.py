@@ -0,0 +1,35 @@
+import unittest
+import sys
+sys.path.append('../src/')
+from lexicon import Lexicon
+from learning_curve import learning_curve, curve_table
+
+class TestLearningCurve(unittest.TestCase):
+    def setUp(self):
+        words = [('buzlɑr', 'buz-lɑr', 'Stem-pl'), ('kɯzlɑr', 'kɯz-lɑr', 'Stem-pl'), ('eller', 'el-ler', 'Stem-pl'),
+                 ('jerlerin', 'jer-ler-in', 'Stem-pl-gen'), ('søzler', 'søz-ler', 'Stem-pl'), ('dɑllɑrɯn', 'dɑl-lɑr-ɯn', 'Stem-pl-gen'),
+                 ('sɑplɑr', 'sɑp-lɑr', 'Stem-pl'), ('jyzyn', 'jyz-yn', 'Stem-gen'), ('iplerin', 'ip-ler-in', 'Stem-pl-gen')]
+        self.lines = ['SF\tSegmentation\tAnalysis\tFreq\n'] + [f'{form}\t{seg}\t{analysis}\t1\n' for form, seg, analysis in words]
+
+    def test_checkpoints(self):
+        curve = list(learning_curve(self.lines, [3, 6], changes_only=False))
+        assert([rows for rows, _, _ in curve] == [3, 6, 9])
+        assert(curve[0][2] == {'pl': ('lɑr', True)})
+        assert(curve[-1][1] == 9)
+        assert(curve[-1][2]['pl'] == ('lAr', False))
+        assert(curve[-1][2]['gen'] == ('in', True))
+
+    def test_matches_ingest(self):
+        lexicon = Lexicon(ipa_file='../data/ipa.txt')
+        lexicon.ingest(self.lines)
+        *_, (rows, n_forms, snapshot) = learning_curve(self.lines, 2, changes_only=False)
+        assert(rows == 9 and n_forms == len(lexicon))
+        assert(snapshot == {affix.feat: (f'{affix.form}', affix.concrete) for affix in lexicon.affixes})
+
+    def test_changes_only(self):
+        table = list(curve_table(learning_curve(self.lines, 1)))
+        assert([row[0] for row in table if row[2] == 'pl'] == [1, 5, 6, 9])
+        assert(table[-1][2:] == ('pl', 'lAr', False))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,291 @@
+import unittest
+import sys
+sys.path.append('../src/')
+from lexicon import Lexicon
+from form import Form
+
+class TestLexicon(unittest.TestCase):
+    def test_abstract_pl(self):
+        lexicon = Lexicon(ipa_file='../data/ipa.txt')
+        lexicon.add_form(form='buzlɑr', segmentation='buz-lɑr', analysis='Stem-pl')
+        lexicon.add_form(form='kɯzlɑr', segmentation='kɯz-lɑr', analysis='Stem-pl')
+        lexicon.add_form(form='eller', segmentation='el-ler', analysis='Stem-pl')
+        assert(f'{lexicon["pl"]}' == '-lɑr')
+        lexicon.add_form(form='jerlerin', segmentation='jer-ler-in', analysis='Stem-pl-gen')
+        lexicon.add_form(form='søzler', segmentation='søz-ler', analysis='Stem-pl')
+        lexicon.add_form(form='dɑllɑrɯn', segmentation='dɑl-lɑr-ɯn', analysis='Stem-pl-gen')
+        lexicon.add_form(form='sɑplɑr', segmentation='sɑp-lɑr', analysis='Stem-pl')
+        lexicon.add_form(form='jyzyn', segmentation='jyz-yn', analysis='Stem-gen')
+        lexicon.add_form(form='iplerin', segmentation='ip-ler-in', analysis='Stem-pl-gen')
+        assert(f'{lexicon["pl"]}' == '-lAr')
+        assert(f'{lexicon["gen"]}' == '-in')
+
+    def test_token_freq(self):
+        types = Lexicon(ipa_file='../data/ipa.txt')
+        tokens = Lexicon(ipa_file='../data/ipa.txt', token_freq=True)
+        for lexicon in (types, tokens):
+            lexicon.add_form(form='buzlɑr', segmentation='buz-lɑr', analysis='Stem-pl', count=2)
+            lexicon.add_form(form='eller', segmentation='el-ler', analysis='Stem-pl', count=3)
+            lexicon.add_form(form='eller', segmentation='el-ler', analysis='Stem-pl', count=1)
+        assert(f'{types["pl"]}' == '-lɑr')
+        assert(f'{tokens["pl"]}' == '-ler')
+        assert(tokens['pl'].exceptions() == 2)
+        assert(len(types) == len(tokens) == 2)
+
+    def test_duplicate_forms(self):
+        lexicon = Lexicon(ipa_file='../data/ipa.txt')
+        f1 = lexicon.add_form(form='buzlɑr', segmentation='buz-lɑr', analysis='Stem-pl')
+        f2 = lexicon.add_form(form='buzlɑr', segmentation='buz-lɑr', analysis='Stem-pl')
+        assert(f1 is f2)
+        f3 = lexicon.add_form(form='buzlɑr', segmentation='buzlɑr', analysis='Stem')
+        assert(f3 is not f1)
+        assert(len(lexicon) == 2)
+        assert(len(lexicon.stems) == 2)
+        assert(lexicon['pl'].exceptions() == 0)
+        assert(sum(lexicon['pl']._forms.values()) == 1)
+
+    def test_lazy(self):
+        lexicon = Lexicon(ipa_file='../data/ipa.txt', lazy=True)
+        lexicon.add_form(form='buzlɑr', segmentation='buz-lɑr', analysis='Stem-pl')
+        lexicon.add_form(form='kɯzlɑr', segmentation='kɯz-lɑr', analysis='Stem-pl')
+        lexicon.add_form(form='eller', segmentation='el-ler', analysis='Stem-pl')
+        assert(lexicon['pl']._dirty)
+        assert(f'{lexicon["pl"]}' == '-lɑr')
+        assert(not lexicon['pl']._dirty)
+        lexicon.add_form(form='jerlerin', segmentation='jer-ler-in', analysis='Stem-pl-gen')
+        lexicon.add_form(form='søzler', segmentation='søz-ler', analysis='Stem-pl')
+        lexicon.add_form(form='dɑllɑrɯn', segmentation='dɑl-lɑr-ɯn', analysis='Stem-pl-gen')
+        lexicon.add_form(form='sɑplɑr', segmentation='sɑp-lɑr', analysis='Stem-pl')
+        lexicon.add_form(form='iplerin', segmentation='ip-ler-in', analysis='Stem-pl-gen')
+        assert(lexicon['pl']._dirty)
+        assert(not lexicon['pl'].concrete)
+        assert(f'{lexicon["pl"]}' == '-lAr')
+
+    def test_lazy_matches_eager(self):
+        eager = Lexicon(ipa_file='../data/ipa.txt')
+        lazy = Lexicon(ipa_file='../data/ipa.txt', lazy=True)
+        eager.ingest('../data/childes.txt')
+        lazy.ingest('../data/childes.txt')
+        assert(eager.build_train() == lazy.build_train())
+        for affix in eager.affixes:
+            assert(f'{affix}' == f'{lazy[affix.feat]}')
+            assert(affix.concrete == lazy[affix.feat].concrete)
+
+    def test_remove_form(self):
+        lexicon = Lexicon(ipa_file='../data/ipa.txt')
+        lexicon.add_form(form='buzlɑr', segmentation='buz-lɑr', analysis='Stem-pl')
+        lexicon.add_form(form='kɯzlɑr', segmentation='kɯz-lɑr', analysis='Stem-pl')
+        lexicon.add_form(form='eller', segmentation='el-ler', analysis='Stem-pl')
+        lexicon.add_form(form='jerlerin', segmentation='jer-ler-in', analysis='Stem-pl-gen')
+        lexicon.add_form(form='søzler', segmentation='søz-ler', analysis='Stem-pl')
+        lexicon.add_form(form='dɑllɑrɯn', segmentation='dɑl-lɑr-ɯn', analysis='Stem-pl-gen')
+        lexicon.add_form(form='sɑplɑr', segmentation='sɑp-lɑr', analysis='Stem-pl')
+        lexicon.add_form(form='iplerin', segmentation='ip-ler-in', analysis='Stem-pl-gen')
+        assert(f'{lexicon["pl"]}' == '-lAr')
+
+        lexicon.remove_form('søzler', analysis='Stem-pl')
+        assert(f'{lexicon["pl"]}' == '-lɑr')
+        assert(lexicon['pl'].concrete)
+        assert(len(lexicon) == 7)
+        assert(len(lexicon.stems) == 7)
+
+        form = lexicon.add_form(form='søzler', segmentation='søz-ler', analysis='Stem-pl')
+        assert(f'{lexicon["pl"]}' == '-lAr')
+        lexicon.remove_form(form)
+        lexicon.remove_form('jerlerin', analysis='Stem-pl-gen')
+        lexicon.remove_form('dɑllɑrɯn', analysis='Stem-pl-gen')
+        lexicon.remove_form('iplerin', analysis='Stem-pl-gen')
+        assert('gen' not in lexicon)
+        self.assertRaises(KeyError, lexicon.remove_form, 'dɑllɑrɯn', analysis='Stem-pl-gen')
+
+    def test_leave_one_out(self):
+        lexicon = Lexicon(ipa_file='../data/ipa.txt')
+        with open('../data/childes.txt', 'r') as f:
+            rows = [line.strip().split('\t') for line in f][1:200]
+        for form, _, segmentation, analysis, _ in rows:
+            lexicon.add_form(form, segmentation, analysis)
+        for form, _, segmentation, analysis, _ in rows[::20]:
+            lexicon.remove_form(form, analysis=analysis)
+            held_out = Lexicon(ipa_file='../data/ipa.txt')
+            for other in rows:
+                if other[0] != form or other[3] != analysis:
+                    held_out.add_form(other[0], other[2], other[3])
+            assert(len(held_out) == len(lexicon))
+            assert({f'{m.feat}{m}' for m in held_out.morphemes} == {f'{m.feat}{m}' for m in lexicon.morphemes})
+            assert(held_out.build_train() == lexicon.build_train())
+            lexicon.add_form(form, segmentation, analysis)
+
+    def test_remove_form_tokens(self):
+        lexicon = Lexicon(ipa_file='../data/ipa.txt', token_freq=True)
+        lexicon.add_form(form='buzlɑr', segmentation='buz-lɑr', analysis='Stem-pl', count=2)
+        lexicon.add_form(form='eller', segmentation='el-ler', analysis='Stem-pl', count=3)
+        lexicon.remove_form('eller', analysis='Stem-pl', count=2)
+        assert(f'{lexicon["pl"]}' == '-lɑr')
+        assert(len(lexicon) == 2)
+        self.assertRaises(ValueError, lexicon.remove_form, 'eller', analysis='Stem-pl', count=2)
+        lexicon.remove_form('eller', analysis='Stem-pl')
+        assert(len(lexicon) == 1)
+        assert(len(lexicon.stems) == 1)
+
+    def test_remove_form_resegmented(self):
+        lexicon = Lexicon(ipa_file='../data/ipa.txt')
+        form = lexicon.add_form(form='buzlɑr', segmentation='buz-lɑr', analysis='Stem-pl')
+        lexicon.add_form(form='eller', segmentation='el-ler', analysis='Stem-pl')
+        lexicon.remove_form(form)
+        assert(lexicon._raw_forms.get('buzlɑr\tStem-pl') is None)
+        form = lexicon.add_form(form='buzlɑr', segmentation='buzl-ɑr', analysis='Stem-pl')
+        assert([f'{s}' for s in form.segmentation] == ['buzl', 'ɑr'])
+        assert(lexicon._raw_forms['buzlɑr\tStem-pl'] is form)
+        assert('buzl' in [f'{stem}' for stem in lexicon.stems] and 'buz' not in [f'{stem}' for stem in lexicon.stems])
+        lexicon.remove_form('buzlɑr', analysis='Stem-pl')
+        assert(len(lexicon) == 1 and len(lexicon._raw_forms) == 1)
+
+    def test_add_form_alias_tokens(self):
+        lexicon = Lexicon(ipa_file='../data/ipa.txt', token_freq=True)
+        form = lexicon.add_form(form='buzlɑr', segmentation='buz-lɑr', analysis='Stem-pl', count=2)
+        # the same form, under another string and segmentation
+        assert(lexicon.add_form(form=list('buzlɑr'), segmentation='buzl-ɑr', analysis='Stem-pl', count=3) is form)
+        assert(lexicon._token_counts[form] == 5)
+        assert([f'{stem}' for stem in lexicon.stems] == ['buz'])
+        assert(dict(lexicon['pl']._forms) == {form.segmentation[1]: 5})
+        lexicon.remove_form(form, count=5)
+        assert(len(lexicon) == 0 and len(lexicon.morphemes) == 0 and len(lexicon._raw_forms) == 0)
+
+    def test_ingest_1(self):
+        lexicon = Lexicon(ipa_file='../data/ipa.txt')
+        lines = ['SF\tWord\tSegmentation\tAnalysis\tFreq\n',
+                 'buzlɑr\tbuzlar\tbuz-lɑr\tStem-pl\t3\n',
+                 'kɯzlɑr\tkızlar\tkɯz-lɑr\tStem-pl\n', # missing column
+                 'eller\teller\tel-ler\tStem\t2\n', # segmentation does not match analysis
+                 'søzler\tsözler\tsøz-ler\tStem-pl\tmany\n', # bad frequency
+                 'buzlɑr\tbuzlar\tbuz-lɑr\tStem-pl\t3\n']
+        stats = lexicon.ingest(lines)
+        assert(stats['rows'] == 2)
+        assert(stats['added'] == 1)
+        assert(stats['skipped_columns'] == 1)
+        assert(stats['skipped_segmentation'] == 1)
+        assert(stats['skipped_freq'] == 1)
+        assert(len(lexicon) == 1)
+        assert(f'{lexicon["pl"]}' == '-lɑr')
+
+    def test_ingest_file(self):
+        streamed = Lexicon(ipa_file='../data/ipa.txt')
+        stats = streamed.ingest('../data/childes.txt')
+        serial = Lexicon(ipa_file='../data/ipa.txt')
+        with open('../data/childes.txt', 'r') as f:
+            next(f)
+            for line in f:
+                form, _, segmentation, analysis, _ = line.strip().split('\t')
+                serial.add_form(form, segmentation, analysis)
+        assert(stats['rows'] == 1727)
+        assert(len(streamed) == len(serial))
+        assert(streamed.build_train() == serial.build_train())
+
+    def test_compact(self):
+        lexicon = Lexicon(ipa_file='../data/ipa.txt')
+        compact = Lexicon(ipa_file='../data/ipa.txt', compact=True)
+        lexicon.ingest('../data/childes.txt')
+        compact.ingest('../data/childes.txt')
+        assert(len(lexicon) == len(compact))
+        assert(lexicon.build_train() == compact.build_train())
+        form = compact.add_form(form='eller', segmentation='el-ler', analysis='Stem-pl')
+        assert(form.form == 'eller')
+        assert(form.segmentation == ['el', 'ler'])
+
+    def test_init(self):
+        with self.assertRaises(ValueError):
+            Lexicon()
+        assert(Lexicon(alphabet=Lexicon(ipa_file='../data/ipa.txt').alphabet).alphabet is not None)
+
+    def test_merge(self):
+        words = [('buzlɑr', 'buz-lɑr', 'Stem-pl'), ('kɯzlɑr', 'kɯz-lɑr', 'Stem-pl'), ('eller', 'el-ler', 'Stem-pl'),
+                 ('jerlerin', 'jer-ler-in', 'Stem-pl-gen'), ('søzler', 'søz-ler', 'Stem-pl'), ('dɑllɑrɯn', 'dɑl-lɑr-ɯn', 'Stem-pl-gen'),
+                 ('sɑplɑr', 'sɑp-lɑr', 'Stem-pl'), ('jyzyn', 'jyz-yn', 'Stem-gen'), ('iplerin', 'ip-ler-in', 'Stem-pl-gen')]
+        serial, first, second = Lexicon(ipa_file='../data/ipa.txt'), Lexicon(ipa_file='../data/ipa.txt'), Lexicon(ipa_file='../data/ipa.txt')
+        for word in words:
+            serial.add_form(*word)
+        for word in words[:5]:
+            first.add_form(*word)
+        for word in words[3:]: # overlapping forms are only counted once
+            second.add_form(*word)
+        first.merge(second)
+        assert(len(first) == len(serial))
+        assert(f'{first["pl"]}' == '-lAr' and not first['pl'].concrete)
+        assert(f'{first["gen"]}' == '-in')
+        for morph in serial.morphemes:
+            assert(dict(first[morph]._forms) == dict(morph._forms))
+        assert(first.build_train() == serial.build_train())
+
+    def test_merge_alphabets(self):
+        first, second = Lexicon(ipa_file='../data/ipa.txt'), Lexicon(ipa_file='../data/ipa.txt')
+        first.add_form('buzlɑr', 'buz-lɑr', 'Stem-pl')
+        second.add_form('elbe', 'el-be', 'Stem-x')
+        first.merge(second)
+        assert(all(morph.alphabet is first.alphabet for morph in first.morphemes))
+        assert(all(form.alphabet is first.alphabet for form in first.forms))
+        # underspecified segments learned after the merge are all in the merged lexicon's alphabet
+        for stem, p, b in zip(['ip', 'et', 'ek', 'ul', 'on', 'is'], 'ptkptk', 'bdgbdg'):
+            first.add_form(f'{stem}{p}e', f'{stem}-{p}e', 'Stem-y')
+            first.add_form(f'{stem}{b}e', f'{stem}-{b}e', 'Stem-x')
+        assert(not first['x'].concrete and not first['y'].concrete)
+        assert(f'{first["x"]}' != f'{first["y"]}')
+
+    def test_parallel_ingest(self):
+        from parallel_ingest import parallel_ingest, read_range, shard_ranges
+        header, ranges = shard_ranges('../data/childes.txt', 3)
+        with open('../data/childes.txt', 'r', encoding='utf-8') as f:
+            assert([header] + [line for lo, hi in ranges for line in read_range('../data/childes.txt', lo, hi)] == list(f))
+        serial = Lexicon(ipa_file='../data/ipa.txt')
+        serial_stats = serial.ingest('../data/childes.txt')
+        lexicon, stats = parallel_ingest('../data/childes.txt', ipa_file='../data/ipa.txt', processes=3)
+        assert(stats['rows'] == serial_stats['rows'] and stats['added'] == serial_stats['added'])
+        assert(list(lexicon.forms) == list(serial.forms))
+        assert({affix.feat: f'{affix}' for affix in lexicon.affixes} == {affix.feat: f'{affix}' for affix in serial.affixes})
+        assert(lexicon.build_train() == serial.build_train())
+
+    def test_train_updates(self):
+        lexicon = Lexicon(ipa_file='../data/ipa.txt')
+        lexicon.add_form(form='buzlɑr', segmentation='buz-lɑr', analysis='Stem-pl')
+        lexicon.add_form(form='kɯzlɑr', segmentation='kɯz-lɑr', analysis='Stem-pl')
+        lexicon.add_form(form='jyzyn', segmentation='jyz-yn', analysis='Stem-gen')
+        updated, removed = lexicon.train_updates()
+        assert([pair for _, pair in updated] == list(lexicon.iter_train()))
+        assert(removed == [])
+        assert(lexicon.train_updates() == ([], []))
+        for form, segmentation, analysis in [('eller', 'el-ler', 'Stem-pl'), ('jerlerin', 'jer-ler-in', 'Stem-pl-gen'), ('søzler', 'søz-ler', 'Stem-pl'),
+                                             ('dɑllɑrɯn', 'dɑl-lɑr-ɯn', 'Stem-pl-gen'), ('sɑplɑr', 'sɑp-lɑr', 'Stem-pl'), ('iplerin', 'ip-ler-in', 'Stem-pl-gen')]:
+            lexicon.add_form(form=form, segmentation=segmentation, analysis=analysis)
+        lexicon.remove_form('jyzyn', 'Stem-gen')
+        updated, removed = lexicon.train_updates()
+        assert(removed == [(Form('jyzyn', 'jyz-yn', 'Stem-gen', lexicon.alphabet), ('jyzyn', 'jyzyn'))])
+        # -pl became abstract, so the earlier forms with it are re-derived
+        assert(('buzlAr', 'buzlɑr') in [pair for _, pair in updated])
+        train = dict(updated)
+        assert(len(train) == len(lexicon))
+        assert(sorted(set(train.values())) == lexicon.build_train())
+
+    def test_build_ur_sr_batch(self):
+        lexicon = Lexicon(ipa_file='../data/ipa.txt', add_segs=False)
+        lexicon.add_form(form='buzlɑr', segmentation='buz-lɑr', analysis='Stem-pl')
+        lexicon.add_form(form='kɯzlɑr', segmentation='kɯz-lɑr', analysis='Stem-pl')
+        lexicon.add_form(form='eller', segmentation='el-ler', analysis='Stem-pl')
+        lexicon.add_form(form='jerlerin', segmentation='jer-ler-in', analysis='Stem-pl-gen')
+        lexicon.add_form(form='søzler', segmentation='søz-ler', analysis='Stem-pl')
+        lexicon.add_form(form='dɑllɑrɯn', segmentation='dɑl-lɑr-ɯn', analysis='Stem-pl-gen')
+        lexicon.add_form(form='sɑplɑr', segmentation='sɑp-lɑr', analysis='Stem-pl')
+        lexicon.add_form(form='jyzyn', segmentation='jyz-yn', analysis='Stem-gen')
+        lexicon.add_form(form='iplerin', segmentation='ip-ler-in', analysis='Stem-pl-gen')
+        forms = [('otlɑr', 'ot-lɑr', 'Stem-pl'), ('otlɑrɯn', 'ot-lɑr-ɯn', 'Stem-pl-gen'), ('otum', 'ot-um', 'Stem-p1s'),
+                 ('buzlɑr', 'buz-lɑr', 'Stem-pl'), ('jyzyn', 'jyz-yn', 'Stem-gen'), ('ot', 'ot', 'Stem')]
+        segments = len(lexicon.alphabet.id_to_segment)
+        batch = lexicon.build_ur_sr_batch(forms)
+        assert(len(lexicon.alphabet.id_to_segment) == segments) # 'o' was not added
+        assert(batch[0] == (f'ot{lexicon["pl"].form}', 'otlɑr') and not lexicon['pl'].concrete)
+        assert(batch[2] == ('ot??', 'otum')) # -p1s is not in the lexicon
+        assert(batch == [lexicon.build_ur_sr(*form, unknown=True) for form in forms])
+        assert(lexicon.build_ur_sr_batch(forms, segmented=True) == [lexicon.build_ur_sr(*form, unknown=True, segmented=True) for form in forms])
+        with self.assertRaises(KeyError):
+            lexicon.build_ur_sr_batch([('buzx', 'buz-x', 'Stem-pl')])
+
+if __name__ == "__main__":
+    unittest.main()
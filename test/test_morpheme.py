@@ -37,5 +37,72 @@ class TestMorpheme(unittest.TestCase):
             gen.add_form(f2_ep)
         assert(gen.form == 'Hn')
 
+    def test_abstract_gen_weighted(self):
+        alph = Alphabet(ipa_file='../data/ipa.txt', add_segs=True)
+        f1 = Form('in', segmentation='-in', analysis='-gen', alphabet=alph)
+        f1_ep = Form('nin', segmentation='-nin', analysis='-gen', alphabet=alph)
+        f2 = Form('un', segmentation='-un', analysis='-gen', alphabet=alph)
+        f2_ep = Form('nun', segmentation='-nun', analysis='-gen', alphabet=alph)
+        gen = Morpheme(form=f1, count=15)
+        gen.add_form(f1_ep, count=9)
+        gen.add_form(f2, count=2)
+        gen.add_form(f2_ep, count=3)
+        assert(gen.form == 'Hn')
+        self.assertRaises(ValueError, gen.add_form, f1, count=0)
+
+    def test_collapse_plan_reused(self):
+        alph = Alphabet(ipa_file='../data/ipa.txt', add_segs=True)
+        lar = Form('lɑr', segmentation='-lɑr', analysis='-pl', alphabet=alph)
+        ler = Form('ler', segmentation='-ler', analysis='-pl', alphabet=alph)
+        lr = Form('lr', segmentation='-lr', analysis='-pl', alphabet=alph)
+        pl = Morpheme(form=lar.form, feat='pl', count=4)
+        pl.add_form(ler.form, count=4)
+        assert(pl.form == 'lAr')
+        plan = pl._collapse_plan
+        pl.add_form(lar.form)
+        pl.add_form(ler.form)
+        assert(pl.form == 'lAr')
+        assert(pl._collapse_plan is plan)
+        pl.add_form(lr.form) # aligned as ∅lr, so the vowel position also holds l and takes its most frequent segment
+        assert(pl.form == 'lɑr')
+        assert(not pl.concrete)
+        assert(pl._collapse_plan is not plan)
+        assert(pl.collapse_into_abstract() == 'lɑr')
+
+    def test_collapse_plan_reused_underspec(self):
+        alph = Alphabet(ipa_file='../data/ipa.txt', add_segs=True)
+        pl = Morpheme(form=Form('lɑr', segmentation='-lɑr', analysis='-pl', alphabet=alph).form, feat='pl', lazy=True)
+        pl.add_form(Form('lur', segmentation='-lur', analysis='-pl', alphabet=alph).form)
+        n = len(alph.id_to_segment)
+        assert(pl.collapse_into_abstract() == 'lBr')
+        assert(len(alph.id_to_segment) == n + 1) # the plan added an underspecified segment
+        plan = pl._collapse_plan
+        assert(pl.collapse_into_abstract() == 'lBr')
+        assert(pl._collapse_plan is plan)
+
+    def test_argmax_ties(self):
+        alph = Alphabet(ipa_file='../data/ipa.txt', add_segs=True)
+        lar = Form('lɑr', segmentation='-lɑr', analysis='-pl', alphabet=alph)
+        ler = Form('ler', segmentation='-ler', analysis='-pl', alphabet=alph)
+        pl = Morpheme(form=ler.form, feat='pl')
+        pl.add_form(form=lar.form)
+        assert(pl.form == 'lɑr') # ties are broken by the reverse string order
+        pl.add_form(form=ler.form)
+        assert(pl.form == 'ler')
+        assert(pl.exceptions() == 1)
+        assert(pl.concrete)
+
+    def test_version(self):
+        alph = Alphabet(ipa_file='../data/ipa.txt', add_segs=True)
+        lar = Form('lɑr', segmentation='-lɑr', analysis='-pl', alphabet=alph)
+        ler = Form('ler', segmentation='-ler', analysis='-pl', alphabet=alph)
+        pl = Morpheme(form=lar.form, feat='pl')
+        version = pl.version
+        pl.add_form(form=lar.form)
+        assert(pl.version == version) # the UR is unchanged
+        for _ in range(3):
+            pl.add_form(form=ler.form)
+        assert(pl.form == 'ler' and pl.version == version + 1)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,44 @@
+import unittest
+import sys
+sys.path.append('../src/')
+from alphabet import Alphabet
+from natural_class import NaturalClass
+
+class TestNaturalClass(unittest.TestCase):
+    def test_contains_1(self):
+        alph = Alphabet(ipa_file='../data/ipa.txt', add_segs=True)
+        nasal = NaturalClass({'+nas'}, alph)
+
+        assert('m' in nasal)
+        assert(alph['n'] in nasal)
+        assert('b' not in nasal)
+        assert(f'{nasal.extension_str}' == '{m,n}')
+
+        voiced_nasal = NaturalClass({'+nas', '-voice'}, alph)
+        assert('m' not in voiced_nasal)
+        assert(NaturalClass({'+voice', '-voice'}, alph).extension_str == '{}')
+
+    def test_add_remove_feat_1(self):
+        alph = Alphabet(ipa_file='../data/ipa.txt', add_segs=True)
+        nat_class = NaturalClass({'-cons', '+back'}, alph)
+        assert('ɑ' in nat_class)
+        assert('e' not in nat_class)
+
+        nat_class.add_feat('+round')
+        assert('ɑ' not in nat_class)
+        assert('u' in nat_class)
+
+        nat_class.remove_feat('+round')
+        assert('ɑ' in nat_class)
+
+    def test_extension_str_grows(self):
+        alph = Alphabet(ipa_file='../data/ipa.txt', add_segs=True)
+        nat_class = NaturalClass({'+nas'}, alph)
+        assert(nat_class.extension_str == '{m,n}')
+        vec = list(alph['m'].feature_vec)
+        vec[alph.feature_space.index('lab')] = '?'
+        alph.add_underspec(vec)
+        assert(nat_class.extension_str == '{B,m,n}')
+
+if __name__ == "__main__":
+    unittest.main()
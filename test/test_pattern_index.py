@@ -0,0 +1,42 @@
+import unittest
+import sys
+sys.path.append('../src/')
+from lexicon import Lexicon
+from natural_class import NaturalClass
+from sequence import Sequence
+from pattern_index import PatternIndex
+
+class TestPatternIndex(unittest.TestCase):
+    def setUp(self):
+        self.lexicon = Lexicon(ipa_file='../data/ipa.txt')
+        for form, seg, analysis in [('buzlɑr', 'buz-lɑr', 'Stem-pl'), ('eller', 'el-ler', 'Stem-pl'), ('jerlerin', 'jer-ler-in', 'Stem-pl-gen'),
+                                    ('iplerin', 'ip-ler-in', 'Stem-pl-gen'), ('jyzyn', 'jyz-yn', 'Stem-gen')]:
+            self.lexicon.add_form(form, seg, analysis)
+        self.index = PatternIndex(self.lexicon)
+
+    def test_search_1(self):
+        assert([(f'{form}', i) for form, i in self.index.search('ler')] == [('eller', 2), ('jerlerin', 3), ('iplerin', 2)])
+        assert([(f'{form}', i) for form, i in self.index.search('ler#')] == [('eller', 2)])
+        assert([(f'{form}', i) for form, i in self.index.search('#*l')] == [('eller', 0)])
+        assert(self.index.count('l*r') == 4)
+        assert(self.index.count('lɑrɯn') == 0)
+
+    def test_search_2(self):
+        alph = self.lexicon.alphabet
+        pattern = Sequence([NaturalClass({'-cons', '-back'}, alph), {'r', 'p'}])
+        assert([(f'{form}', i) for form, i in self.index.search(pattern)] == [('eller', 3), ('jerlerin', 1), ('jerlerin', 4), ('iplerin', 0), ('iplerin', 3)])
+        assert([f'{form}' for form in self.index.forms_matching(pattern)] == ['eller', 'jerlerin', 'iplerin'])
+        assert(self.index.count(['#', '*', '*', '*', '*', '*', '#']) == 2)
+        with self.assertRaises(ValueError):
+            self.index.search('l#r')
+
+    def test_alphabet_grows(self):
+        alph = self.lexicon.alphabet
+        vec = list(alph['l'].feature_vec)
+        vec[alph.feature_index['lat']] = '?'
+        alph.add_underspec(vec) # as when a UR is collapsed
+        assert(self.index.count('ler') == 3)
+        assert(self.index.count([NaturalClass({'+son'}, alph), 'e']) == 4)
+
+if __name__ == "__main__":
+    unittest.main()
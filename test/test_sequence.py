@@ -2,7 +2,7 @@ import unittest
 import sys
 sys.path.append('../src/')
 from segment import Segment
-from sequence import Sequence
+from sequence import Sequence, FrozenSequence
 from alphabet import Alphabet
 from natural_class import NaturalClass
 
@@ -86,6 +86,64 @@ class TestSequence(unittest.TestCase):
         seq = Sequence(['*', nat_class, '#'])
         assert(f'{seq}' == '*{+voiced,-sonorant}#')
 
+    def test_alphabet_init_1(self):
+        alph = Alphabet(add_segs=True)
+        seq = Sequence('buz.lɑr∅', alphabet=alph)
+        assert(seq == 'buz.lɑr∅')
+        assert(seq[0] is alph['b'])
+        assert(seq[3].feature_vec == []) # boundaries are not looked up in the alphabet
+        assert(Sequence('b\u0303', alphabet=alph).seq == [None]) # no nasal b
+
+    def test_tokenize_batch_1(self):
+        alph = Alphabet(add_segs=True)
+        batch = alph.tokenize_batch(['buz', 'lɑr', 'buz'])
+        assert(batch == [alph.tokenize('buz'), alph.tokenize('lɑr'), alph.tokenize('buz')])
+        assert(batch[0] is not batch[2])
+
+    def test_compact_1(self):
+        alph = Alphabet(add_segs=True)
+        seq = Sequence('buzlɑr', alphabet=alph)
+        compact = seq.compact()
+        assert(compact is not seq)
+        assert(compact == seq)
+        assert(f'{compact}' == 'buzlɑr')
+        assert(hash(compact) == hash(seq))
+        assert(compact[0] is alph['b'])
+        assert(list(compact) == seq.seq)
+        assert(len(compact) == 6)
+        self.assertRaises(TypeError, compact.__setitem__, 0, alph['p'])
+        mutable = compact.copy()
+        mutable[0] = alph['p']
+        assert(mutable == 'puzlɑr')
+
+        seq = Sequence('buz.lɑr', alphabet=alph)
+        assert(seq.compact() is seq) # boundaries are not alphabet segments
+
+    def test_ids_1(self):
+        alph = Alphabet(add_segs=True)
+        seq = Sequence('buzlɑr', alphabet=alph)
+        assert(list(seq.ids()) == [alph.ipa_to_id[c] for c in 'buzlɑr'])
+        assert(seq.compact().ids() == seq.ids())
+        assert(seq.freeze().ids() == seq.ids())
+        self.assertRaises(KeyError, Sequence('buz.lɑr', alphabet=alph).ids)
+
+    def test_frozen_1(self):
+        alph = Alphabet(add_segs=True)
+        seq = Sequence('buzlɑr', alphabet=alph)
+        frozen = seq.freeze()
+        assert(frozen == seq)
+        assert(seq == frozen)
+        assert(frozen == FrozenSequence('buzlɑr', alphabet=alph))
+        assert(frozen != FrozenSequence('buzler', alphabet=alph))
+        assert(frozen == 'buzlɑr')
+        assert(hash(frozen) == hash(seq))
+        assert(len({frozen, seq, FrozenSequence('buzlɑr', alphabet=alph)}) == 1)
+        self.assertRaises(TypeError, frozen.__setitem__, 0, alph['p'])
+        mutable = frozen.copy()
+        mutable += alph['p']
+        assert(f'{mutable}' == 'buzlɑrp')
+        assert(f'{frozen}' == 'buzlɑr')
+
     def test_merge_1(self):
         s1 = Sequence(Segment('a'))
         s2 = Sequence(Segment('b'))
@@ -0,0 +1,68 @@
+import unittest
+import os
+import tempfile
+import sys
+sys.path.append('../src/')
+from lexicon import Lexicon
+from snapshot import LexiconSnapshot
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.lexicon = Lexicon(ipa_file='../data/ipa.txt')
+        self.lexicon.add_form(form='buzlɑr', segmentation='buz-lɑr', analysis='Stem-pl')
+        self.lexicon.add_form(form='kɯzlɑr', segmentation='kɯz-lɑr', analysis='Stem-pl')
+        self.lexicon.add_form(form='eller', segmentation='el-ler', analysis='Stem-pl')
+        self.lexicon.add_form(form='jerlerin', segmentation='jer-ler-in', analysis='Stem-pl-gen')
+        self.lexicon.add_form(form='søzler', segmentation='søz-ler', analysis='Stem-pl')
+        self.lexicon.add_form(form='dɑllɑrɯn', segmentation='dɑl-lɑr-ɯn', analysis='Stem-pl-gen')
+        self.lexicon.add_form(form='sɑplɑr', segmentation='sɑp-lɑr', analysis='Stem-pl')
+        self.lexicon.add_form(form='jyzyn', segmentation='jyz-yn', analysis='Stem-gen')
+        self.lexicon.add_form(form='iplerin', segmentation='ip-ler-in', analysis='Stem-pl-gen')
+        self.lexicon.add_form(form='ip', segmentation='ip', analysis='Stem')
+        fd, self.path = tempfile.mkstemp(suffix='.snap')
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_round_trip(self):
+        self.lexicon.save(self.path)
+        lexicon = Lexicon.load(self.path)
+        assert(list(lexicon.forms) == list(self.lexicon.forms))
+        assert(f'{lexicon["pl"]}' == '-lAr' and not lexicon['pl'].concrete)
+        assert(f'{lexicon["gen"]}' == '-in')
+        assert(lexicon.alphabet['A'].feature_vec == self.lexicon.alphabet['A'].feature_vec) # learned underspecified segment
+        for morph in self.lexicon.morphemes:
+            assert(dict(lexicon[morph]._forms) == dict(morph._forms))
+        assert(lexicon.build_train() == self.lexicon.build_train())
+        lexicon.add_form(form='kɯzlɑr', segmentation='kɯz-lɑr', analysis='Stem-pl') # a repeated form
+        assert(len(lexicon) == len(self.lexicon))
+
+    def test_round_trip_null(self):
+        self.lexicon.add_form(form='gel', segmentation='gel-', analysis='Stem-3sg')
+        self.lexicon.add_form(form='bil', segmentation='bil-', analysis='Stem-3sg')
+        self.lexicon.add_form(form='geldi', segmentation='gel-di', analysis='Stem-3sg')
+        assert(self.lexicon['3sg'].null)
+        self.lexicon.save(self.path)
+        lexicon = Lexicon.load(self.path)
+        assert(lexicon['3sg'].null and f'{lexicon["3sg"].form}' == '')
+        assert(dict(lexicon['3sg']._forms) == dict(self.lexicon['3sg']._forms))
+        assert(lexicon.build_train() == self.lexicon.build_train())
+
+    def test_lazy_access(self):
+        self.lexicon.save(self.path)
+        with LexiconSnapshot(self.path) as snapshot:
+            assert(len(snapshot) == len(self.lexicon))
+            assert(f'{snapshot["pl"]}' == '-lAr')
+            assert('ip' in snapshot and 'sg' not in snapshot)
+            assert(f'{snapshot.form(1)}' == 'kɯzlɑr')
+            assert([f'{form}' for form in snapshot.forms()] == [f'{form}' for form in self.lexicon.forms])
+
+    def test_bad_file(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a snapshot' * 4)
+        with self.assertRaises(ValueError):
+            LexiconSnapshot(self.path)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,7 @@
 import unittest
 import sys
 sys.path.append('../src/')
-from utils import powerset
+from utils import powerset, align_blanks
 
 class TestUtils(unittest.TestCase):
     def test_powerset_1(self):
@@ -13,5 +13,12 @@ class TestUtils(unittest.TestCase):
     def test_powerset_3(self):
         assert(powerset({}) == {()})
 
+    def test_align_blanks(self):
+        assert(align_blanks('lr', 'lar') == 'l∅r')
+        assert(align_blanks('in', 'nin') == '∅in')
+        assert(align_blanks('ab', 'abab', return_ties=True) == ['∅∅ab', 'a∅∅b', 'ab∅∅'])
+        with self.assertRaises(ValueError):
+            align_blanks('lar', 'lr')
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
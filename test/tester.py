@@ -3,7 +3,14 @@ from test_utils import TestUtils
 from test_segment import TestSegment
 from test_sequence import TestSequence
 from test_alphabet import TestAlphabet
+from test_natural_class import TestNaturalClass
 from test_morpheme import TestMorpheme
+from test_lexicon import TestLexicon
+from test_learning_curve import TestLearningCurve
+from test_snapshot import TestSnapshot
+from test_alignment import TestAlignment
+from test_pattern_index import TestPatternIndex
+from test_context_table import TestContextTable
 
 '''
 A script to run all the test cases.
@@ -17,6 +24,13 @@ suites = unittest.TestSuite([build_suite(TestUtils),
                              build_suite(TestSegment),
                              build_suite(TestSequence),
                              build_suite(TestAlphabet),
-                             build_suite(TestMorpheme)])
+                             build_suite(TestNaturalClass),
+                             build_suite(TestMorpheme),
+                             build_suite(TestLexicon),
+                             build_suite(TestLearningCurve),
+                             build_suite(TestSnapshot),
+                             build_suite(TestAlignment),
+                             build_suite(TestPatternIndex),
+                             build_suite(TestContextTable)])
 # run the test suites
 unittest.TextTestRunner(verbosity=2).run(suites)